@@ -2,6 +2,7 @@ import React, { useState } from "react";
 import {
   uploadExcelFiles,
   triggerMerge,
+  waitForMerge,
   fetchPreview,
   resetAllData,
 } from "./api";
@@ -26,7 +27,8 @@ const UploadPage = () => {
       const res = await uploadExcelFiles(files);
       setMessage(res.data.message);
 
-      await triggerMerge();
+      const mergeRes = await triggerMerge();
+      await waitForMerge(mergeRes.data.job_id);
       const previewRes = await fetchPreview();
       setPreviewData(previewRes.data);
     } catch (err) {
@@ -56,7 +58,7 @@ const UploadPage = () => {
         <input
           type="file"
           multiple
-          accept=".xls,.xlsx"
+          accept=".xls,.xlsx,.csv,.parquet"
           onChange={handleFileChange}
           className="mb-4"
         />
@@ -0,0 +1,38 @@
+"""add sale_records composite indexes
+
+Revision ID: 5c1f0e9a7b21
+Revises: 
+Create Date: 2026-10-17 10:12:40.118263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e9a7b21'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_sale_records_user_fy_month_product": ["user", "financial_year", "month", "product"],
+    "ix_sale_records_user_id": ["user", "id"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY on Postgres so ingestion is not blocked while the
+    # indexes are created on a large table.
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, "sale_records", columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name="sale_records", if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,101 @@
+"""optionally LIST-partition sale_records
+
+Revision ID: 9d4b2c6e81f3
+Revises: 5c1f0e9a7b21
+Create Date: 2026-10-17 10:31:05.402716
+
+Partitioning is opt-in and Postgres only. Pass the partition key on the
+command line:
+
+    alembic -x partition=financial_year upgrade head
+    alembic -x partition=user upgrade head
+
+Without it this revision is a no-op. sale_records is rebuilt as a table
+partitioned by LIST on the chosen column, with one partition per value
+already present plus a DEFAULT partition for new users / financial years.
+The primary key cannot be kept because Postgres requires the partition key
+in every unique constraint and the key columns are nullable; id stays
+indexed instead.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b2c6e81f3'
+down_revision: Union[str, None] = '5c1f0e9a7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITION_KEYS = ("user", "financial_year")
+
+
+def _partition_key():
+    key = context.get_x_argument(as_dictionary=True).get("partition")
+    if key and key not in PARTITION_KEYS:
+        raise ValueError(f"partition must be one of {', '.join(PARTITION_KEYS)}")
+    return key
+
+
+def _is_partitioned(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'sale_records'"
+    )).scalar())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    key = _partition_key()
+    if not key or context.is_offline_mode():
+        return
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or _is_partitioned(bind):
+        return
+
+    values = [row[0] for row in bind.execute(sa.text(
+        f'SELECT DISTINCT "{key}" FROM sale_records WHERE "{key}" IS NOT NULL ORDER BY 1'
+    ))]
+
+    op.execute("ALTER TABLE sale_records RENAME TO sale_records_unpartitioned")
+    op.execute(
+        "CREATE TABLE sale_records (LIKE sale_records_unpartitioned INCLUDING DEFAULTS) "
+        f'PARTITION BY LIST ("{key}")'
+    )
+    op.execute("ALTER SEQUENCE IF EXISTS sale_records_id_seq OWNED BY sale_records.id")
+    for number, value in enumerate(values):
+        literal = value.replace("'", "''")
+        bind.exec_driver_sql(
+            f"CREATE TABLE sale_records_p{number} PARTITION OF sale_records FOR VALUES IN ('{literal}')"
+        )
+    op.execute("CREATE TABLE sale_records_default PARTITION OF sale_records DEFAULT")
+    op.execute("INSERT INTO sale_records SELECT * FROM sale_records_unpartitioned")
+    op.execute("DROP TABLE sale_records_unpartitioned")
+
+    op.create_index("ix_sale_records_id", "sale_records", ["id"])
+    op.create_index("ix_sale_records_user_fy_month_product", "sale_records", ["user", "financial_year", "month", "product"])
+    op.create_index("ix_sale_records_user_id", "sale_records", ["user", "id"])
+    op.execute("ANALYZE sale_records")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if context.is_offline_mode():
+        return
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _is_partitioned(bind):
+        return
+
+    op.execute("ALTER TABLE sale_records RENAME TO sale_records_partitioned")
+    op.execute("CREATE TABLE sale_records (LIKE sale_records_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER SEQUENCE IF EXISTS sale_records_id_seq OWNED BY sale_records.id")
+    op.execute("INSERT INTO sale_records SELECT * FROM sale_records_partitioned")
+    op.execute("DROP TABLE sale_records_partitioned CASCADE")
+    op.execute("ALTER TABLE sale_records ADD PRIMARY KEY (id)")
+
+    op.create_index("ix_sale_records_id", "sale_records", ["id"])
+    op.create_index("ix_sale_records_user_fy_month_product", "sale_records", ["user", "financial_year", "month", "product"])
+    op.create_index("ix_sale_records_user_id", "sale_records", ["user", "id"])
@@ -0,0 +1,69 @@
+"""add sale_summary rollup
+
+Revision ID: b7e3f5a90c12
+Revises: 9d4b2c6e81f3
+Create Date: 2026-10-17 11:02:17.530914
+
+sale_summary holds sale_records rolled up to the /summary grain
+(user, financial_year, month, product, tax_rate). /merge adds each ingested
+batch to it; this revision backfills it from the rows already loaded.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f5a90c12'
+down_revision: Union[str, None] = '9d4b2c6e81f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+GRAIN = ["user", "financial_year", "month", "product", "tax_rate"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases set up with Base.metadata.create_all already have the table
+    # (with its unique constraint), so only what is missing is created.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("sale_summary"):
+        op.create_table(
+            "sale_summary",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user", sa.String(), nullable=False),
+            sa.Column("financial_year", sa.String()),
+            sa.Column("month", sa.String()),
+            sa.Column("product", sa.String()),
+            sa.Column("tax_rate", sa.Float()),
+            sa.Column("qty", sa.Float()),
+            sa.Column("sale_value", sa.Float()),
+            sa.Column("tax_value", sa.Float()),
+            sa.Column("total_value", sa.Float()),
+            sa.Column("row_count", sa.Integer(), nullable=False),
+            sa.UniqueConstraint(*GRAIN, name="uq_sale_summary_grain"),
+        )
+    else:
+        existing = {item["name"] for item in inspector.get_unique_constraints("sale_summary")}
+        existing |= {item["name"] for item in inspector.get_indexes("sale_summary")}
+        if "uq_sale_summary_grain" not in existing:
+            op.create_index("uq_sale_summary_grain", "sale_summary", GRAIN, unique=True, if_not_exists=True)
+
+    # Backfilled only while empty, so a table /merge already fills is left alone.
+    op.execute(
+        'INSERT INTO sale_summary ("user", financial_year, month, product, tax_rate, '
+        "qty, sale_value, tax_value, total_value, row_count) "
+        'SELECT "user", financial_year, month, product, tax_rate, '
+        "sum(qty), sum(sale_value), sum(tax_value), sum(total_value), count(*) "
+        "FROM sale_records WHERE \"user\" IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM sale_summary) "
+        'GROUP BY "user", financial_year, month, product, tax_rate'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("sale_summary")
@@ -6,15 +6,19 @@ from sqlalchemy.future import select
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+import os
 
-from database import SessionLocal
+from database import get_db
 from models import User as DBUser
 from schemas import User, Token
+from utils import run_in_hash_pool, tokens
 
 # JWT settings
 SECRET_KEY = "supersecretkey123"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Also require the token's user to still exist in the users table on /me.
+CHECK_USER_EXISTS = os.getenv("AUTH_CHECK_USER", "false").lower() in ("1", "true", "yes")
 
 router = APIRouter()
 
@@ -36,10 +40,6 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 # Register
 @router.post("/register", response_model=Token)
 async def register(user: User, db: AsyncSession = Depends(get_db)):
@@ -49,7 +49,7 @@ async def register(user: User, db: AsyncSession = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    hashed_pwd = hash_password(user.password)
+    hashed_pwd = await run_in_hash_pool(hash_password, user.password)
     new_user = DBUser(username=user.username, password=hashed_pwd)
     db.add(new_user)
     await db.commit()
@@ -67,7 +67,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     if not db_user:
         raise HTTPException(status_code=400, detail="Invalid username or password")
 
-    if not verify_password(form_data.password, db_user.password):
+    if not await run_in_hash_pool(verify_password, form_data.password, db_user.password):
         raise HTTPException(status_code=400, detail="Invalid username or password")
 
     token = create_access_token({"sub": db_user.username})
@@ -75,12 +75,18 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 
 # Get current user
 @router.get("/me")
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        return {"username": username}
+        payload = tokens.decode(token, SECRET_KEY, ALGORITHM)
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    username: str = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if CHECK_USER_EXISTS and not tokens.user_known(username):
+        result = await db.execute(select(DBUser.id).where(DBUser.username == username))
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        tokens.remember_user(username)
+    return {"username": username}
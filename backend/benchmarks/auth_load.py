@@ -0,0 +1,154 @@
+# backend/benchmarks/auth_load.py
+#
+# Fires a burst of concurrent /login requests at auth.router while a few
+# clients keep polling /summary, and reports latency percentiles for both.
+# Runs twice: once with bcrypt called directly on the event loop (the old
+# behaviour) and once through utils.run_in_hash_pool. Everything runs in
+# process over httpx's ASGI transport against a scratch SQLite database, so
+# it needs aiosqlite installed.
+#
+#   cd backend && python -m benchmarks.auth_load --logins 40 --concurrency 20
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from .parquet_bench import make_dataset
+
+async def run_inline(func, *args):
+    return func(*args)
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    ms = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1),
+    }
+
+# `started` is when the request was due to go out, so time the event loop
+# spent blocked before it could be sent counts towards its latency.
+async def timed_request(client, method: str, url: str, samples: list, started: float = None, **kwargs):
+    started = started or time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    samples.append(time.perf_counter() - started)
+    response.raise_for_status()
+
+async def scenario(client, args, users: list, token: str) -> dict:
+    logins, summaries = [], []
+    slots = asyncio.Semaphore(args.concurrency)
+    done = asyncio.Event()
+
+    async def login(index: int):
+        async with slots:
+            username = users[index % len(users)]
+            await timed_request(client, "POST", "/auth/login", logins,
+                                data={"username": username, "password": "secret-password"})
+
+    async def poll_summary():
+        headers = {"Authorization": f"Bearer {token}"}
+        due = time.perf_counter()
+        while not done.is_set():
+            await timed_request(client, "GET", "/summary", summaries, started=due,
+                                params={"financial_year": "2022-2023"}, headers=headers)
+            due = max(due + args.summary_interval, time.perf_counter())
+            await asyncio.sleep(due - time.perf_counter())
+
+    pollers = [asyncio.create_task(poll_summary()) for _ in range(args.summary_clients)]
+    await asyncio.sleep(args.summary_interval * 5)
+    started = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(args.logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*pollers)
+    return {"seconds": round(elapsed, 2), "login": percentiles(logins), "summary": percentiles(summaries)}
+
+async def run(args, workdir: str) -> dict:
+    os.chdir(workdir)
+    import auth
+    import database
+    import main
+    import storage
+    import summary
+    import utils
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'auth.db')}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+
+    # The dashboard's /summary endpoint with a merged dataset to answer from.
+    df = make_dataset(args.rows)
+    storage.write_merged(df, os.path.join(main.MERGED_BASE, "bench_merged.parquet"))
+    summary.write_cube(df, summary.cube_path(main.MERGED_BASE, "bench"))
+    token = main.create_access_token({"sub": "bench"})
+
+    app = main.app
+    app.include_router(auth.router, prefix="/auth")
+    app.dependency_overrides[database.get_db] = get_db
+    utils.HASH_WORKERS = args.workers
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        users = [f"user{i}" for i in range(args.users)]
+        await asyncio.gather(*(
+            client.post("/auth/register", json={"username": name, "password": "secret-password"}) for name in users
+        ))
+        for mode, runner in (("event loop", run_inline), ("hash pool", utils.run_in_hash_pool)):
+            auth.run_in_hash_pool = runner
+            results[mode] = await scenario(client, args, users, token)
+
+    utils.shutdown_hash_pool()
+    await engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Login burst vs /summary latency, bcrypt inline vs on the hash pool")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent login requests")
+    parser.add_argument("--summary-clients", type=int, default=4)
+    parser.add_argument("--summary-interval", type=float, default=0.02, help="seconds between polls per client")
+    parser.add_argument("--workers", type=int, default=4, help="HASH_WORKERS for the pooled run")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows in the merged dataset behind /summary")
+    parser.add_argument("--json", help="write the raw results to this file")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="auth_load_")
+    try:
+        results = asyncio.run(run(args, workdir))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'mode':<12}{'burst s':>9}{'login p50':>11}{'login p99':>11}{'summary p50':>13}{'summary p99':>13}{'summary max':>13}")
+    for mode, result in results.items():
+        login, summ = result["login"], result["summary"]
+        print(f"{mode:<12}{result['seconds']:>9.2f}{login['p50_ms']:>11.1f}{login['p99_ms']:>11.1f}"
+              f"{summ['p50_ms']:>13.1f}{summ['p99_ms']:>13.1f}{summ['max_ms']:>13.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
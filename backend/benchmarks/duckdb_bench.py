@@ -0,0 +1,115 @@
+# backend/benchmarks/duckdb_bench.py
+#
+# Compares the /summary engines on merged files of increasing size: the
+# pandas path over the merged file (read the summary columns, build the cube,
+# summarize), the pandas path over a prebuilt cube, and DuckDB SQL over the
+# merged file. Each engine runs in a fresh process with the same imports, so
+# the peak RSS columns are comparable; "import MB" is the peak before the
+# first query.
+#
+#   cd backend && python -m benchmarks.duckdb_bench --rows 100000,1000000,10000000
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+import pyarrow.parquet as pq
+
+import duckdb_engine
+import storage
+import summary
+from .schema_bench import parsed_frame
+
+CHUNK_ROWS = 1_000_000
+QUERIES = {
+    "all rows": {},
+    "year+product": {"financial_year": "2022-2023", "product": "product 7"},
+}
+
+def write_dataset(rows: int, workdir: str) -> tuple:
+    # Built in chunks of at most CHUNK_ROWS so 10M rows fit in memory; each
+    # chunk goes through storage.write_merged and the row groups are copied
+    # into one file.
+    path = os.path.join(workdir, f"merged_{rows}.parquet")
+    writer = None
+    for start in range(0, rows, CHUNK_ROWS):
+        chunk_path = os.path.join(workdir, "chunk.parquet")
+        storage.write_merged(parsed_frame(min(CHUNK_ROWS, rows - start)), chunk_path)
+        chunk = pq.ParquetFile(chunk_path)
+        writer = writer or pq.ParquetWriter(path, chunk.schema_arrow, compression=storage.PARQUET_COMPRESSION)
+        for index in range(chunk.num_row_groups):
+            writer.write_table(chunk.read_row_group(index))
+        chunk.close()
+        os.remove(chunk_path)
+    writer.close()
+
+    cube_file = os.path.join(workdir, f"summary_{rows}.parquet")
+    storage.write_merged(summary.build_cube(storage.read_merged(path, columns=summary.SOURCE_COLUMNS)), cube_file)
+    return path, cube_file
+
+def run_pandas(path: str, cube_file: str, filters: dict):
+    month, financial_year = filters.get("month", ""), filters.get("financial_year", "")
+    df = storage.read_merged(path, columns=summary.SOURCE_COLUMNS, filters=storage.dataset_filters(month, financial_year))
+    return summary.summarize(summary.build_cube(df), **filters)
+
+def run_cube(path: str, cube_file: str, filters: dict):
+    return summary.summarize(storage.read_merged(cube_file), **filters)
+
+def run_duckdb(path: str, cube_file: str, filters: dict):
+    return duckdb_engine.summarize(path, **filters)
+
+ENGINES = {"pandas, merged file": run_pandas, "pandas, cube": run_cube, "duckdb": run_duckdb}
+
+# VmHWM rather than ru_maxrss: the latter is inherited from the parent
+# process, which has just built the dataset.
+def _rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def measure(engine: str, path: str, cube_file: str, filters: dict, repeat: int, results) -> None:
+    imported = _rss_mb()
+    run = ENGINES[engine]
+    timings = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        result = run(path, cube_file, filters)
+        timings.append(time.perf_counter() - started)
+    results.put({
+        "cold_ms": timings[0] * 1000,
+        "warm_ms": statistics.median(timings[1:]) * 1000,
+        "import_mb": imported,
+        "rss_mb": _rss_mb(),
+        "groups": len(result),
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare /summary engines over merged Parquet files")
+    parser.add_argument("--rows", default="100000,1000000,10000000", help="comma-separated dataset sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'rows':>11}  {'engine':<20}{'query':<14}{'cold ms':>9}{'warm ms':>9}{'import MB':>11}{'peak MB':>9}{'groups':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in (int(value) for value in args.rows.split(",")):
+            path, cube_file = write_dataset(rows, workdir)
+            for engine in ENGINES:
+                for query, filters in QUERIES.items():
+                    results = context.Queue()
+                    worker = context.Process(target=measure, args=(engine, path, cube_file, filters, args.repeat, results))
+                    worker.start()
+                    result = results.get()
+                    worker.join()
+                    print(f"{rows:>11,}  {engine:<20}{query:<14}{result['cold_ms']:>9.1f}{result['warm_ms']:>9.1f}"
+                          f"{result['import_mb']:>11.1f}{result['rss_mb']:>9.1f}{result['groups']:>8}")
+            os.remove(path)
+            os.remove(cube_file)
+
+if __name__ == "__main__":
+    main()
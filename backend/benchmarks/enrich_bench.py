@@ -0,0 +1,64 @@
+# backend/benchmarks/enrich_bench.py
+#
+# Compares the per-row lambda used for Month / Year / Financial Year before
+# enrich.py existed with the vectorized enrich.add_date_columns.
+#
+#   cd backend && python -m benchmarks.enrich_bench --rows 1000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import enrich
+
+def make_dates(rows: int, nat_ratio: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2019-04-01") + pd.to_timedelta(rng.integers(0, 365 * 5, rows), unit="D")
+    dates = pd.Series(dates)
+    dates[rng.random(rows) < nat_ratio] = pd.NaT
+    return pd.DataFrame({"Date": dates})
+
+def legacy_enrich(df: pd.DataFrame) -> pd.DataFrame:
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df['Month'] = df['Date'].dt.strftime('%B')
+    df['Year'] = df['Date'].dt.year
+    df['Financial Year'] = df['Date'].apply(lambda d: f"{d.year-1}-{d.year}" if d.month <= 3 else f"{d.year}-{d.year+1}")
+    return df
+
+def timed(fn, df: pd.DataFrame, repeat: int):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        frame = df.copy()
+        started = time.perf_counter()
+        out = fn(frame)
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Month / Financial Year derivation")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--nat-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_dates(args.rows, args.nat_ratio)
+    legacy_time, legacy = timed(legacy_enrich, df, args.repeat)
+    fast_time, fast = timed(enrich.add_date_columns, df, args.repeat)
+
+    valid = legacy["Date"].notna()
+    for col in ["Month", "Financial Year"]:
+        expected = legacy.loc[valid, col].astype(str).reset_index(drop=True)
+        actual = fast.loc[valid, col].astype(str).reset_index(drop=True)
+        assert expected.equals(actual), f"{col} differs from the legacy implementation"
+    assert (legacy.loc[valid, "Year"] == fast.loc[valid, "Year"]).all(), "Year differs from the legacy implementation"
+
+    print(f"rows:        {args.rows:,} ({int((~valid).sum()):,} NaT)")
+    print(f"legacy:      {legacy_time:.3f}s  ({legacy.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+    print(f"vectorized:  {fast_time:.3f}s  ({fast.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+    print(f"speedup:     {legacy_time / fast_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# backend/benchmarks/gst_data.py
+#
+# Synthetic GST sales registers in the upload format: the ExcelRow columns
+# (with spaces), one file per month, the way users export them from their
+# accounting package. Customers carry a GSTIN-style code and a home state;
+# each product has a fixed HSN slab rate and unit. A small share of cells is
+# left blank or padded with spaces, as real exports are.
+#
+# Only pandas, numpy and openpyxl are imported here, so the benchmarks can
+# load this module before choosing which app (backend or repo root) to import.
+#
+#   cd backend && python -m benchmarks.gst_data --files 12 --rows 50000 --out /tmp/gst
+
+import argparse
+import os
+import string
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+UPLOAD_COLUMNS = [
+    "Customer Code", "Customer Name", "Customer Place", "Location of Supply", "Date", "Product",
+    "Tax Rate", "Qty", "Unit of Qty", "Sale Value", "Tax Value", "Total Value",
+]
+
+STATES = [
+    ("27", "Maharashtra", ["Mumbai", "Pune", "Nagpur", "Nashik"]),
+    ("07", "Delhi", ["New Delhi", "Dwarka", "Rohini"]),
+    ("29", "Karnataka", ["Bengaluru", "Mysuru", "Hubballi"]),
+    ("33", "Tamil Nadu", ["Chennai", "Coimbatore", "Madurai"]),
+    ("24", "Gujarat", ["Ahmedabad", "Surat", "Vadodara"]),
+    ("19", "West Bengal", ["Kolkata", "Howrah"]),
+    ("09", "Uttar Pradesh", ["Lucknow", "Kanpur", "Noida"]),
+    ("36", "Telangana", ["Hyderabad", "Warangal"]),
+]
+
+# (product, GST rate %, unit, base unit price)
+PRODUCTS = [
+    ("Rice", 5.0, "kg", 48.0), ("Wheat Flour", 5.0, "kg", 36.0), ("Sugar", 5.0, "kg", 42.0),
+    ("Edible Oil", 5.0, "ltr", 135.0), ("Tea", 5.0, "kg", 420.0), ("Biscuits", 18.0, "nos", 30.0),
+    ("Soap", 18.0, "nos", 45.0), ("Detergent", 18.0, "kg", 110.0), ("Toothpaste", 18.0, "nos", 95.0),
+    ("Butter", 12.0, "kg", 520.0), ("Ghee", 12.0, "ltr", 610.0), ("Mobile Phone", 18.0, "nos", 14500.0),
+    ("Cement", 28.0, "bag", 390.0), ("Paint", 18.0, "ltr", 310.0), ("Tyre", 28.0, "nos", 4200.0),
+    ("Aerated Drink", 28.0, "ltr", 60.0), ("Milk", 0.0, "ltr", 56.0), ("Fresh Vegetables", 0.0, "kg", 40.0),
+    ("HSD", 18.0, "KL", 92000.0), ("Lube", 18.0, "ltr", 380.0),
+]
+
+def _gstin(rng: np.random.Generator, state_code: str) -> str:
+    letters = rng.choice(list(string.ascii_uppercase), 6)
+    digits = rng.integers(0, 10, 4)
+    return f"{state_code}{''.join(letters[:5])}{''.join(map(str, digits))}{letters[5]}1Z{rng.integers(0, 10)}"
+
+def customers(count: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for index in range(count):
+        code, state, places = STATES[rng.integers(len(STATES))]
+        rows.append({
+            "Customer Code": _gstin(rng, code),
+            "Customer Name": f"{rng.choice(['Shree', 'New', 'Sai', 'Om', 'Jai'])} Traders {index}",
+            "Customer Place": rng.choice(places),
+            "Location of Supply": state,
+        })
+    return pd.DataFrame(rows)
+
+# === One month of sales ===
+# Customers follow a skewed (Zipf-like) purchase frequency, quantities are
+# log-normal and prices vary ±15% around the product's base price.
+def sales_register(rows: int, month: pd.Period, customer_table: pd.DataFrame, seed: int = 0,
+                   messy: float = 0.01) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(customer_table) + 1)
+    buyer = rng.choice(len(customer_table), rows, p=weights / weights.sum())
+    product = rng.integers(len(PRODUCTS), size=rows)
+    names, rates, units, prices = (np.array(values) for values in zip(*PRODUCTS))
+
+    qty = np.maximum(1, rng.lognormal(2.0, 1.0, rows).round())
+    sale = (qty * prices[product] * rng.uniform(0.85, 1.15, rows)).round(2)
+    tax = (sale * rates[product] / 100).round(2)
+    days = rng.integers(0, month.days_in_month, rows)
+
+    df = customer_table.iloc[buyer].reset_index(drop=True)
+    df["Date"] = month.start_time + pd.to_timedelta(days, unit="D")
+    df["Product"] = names[product]
+    df["Tax Rate"] = rates[product]
+    df["Qty"] = qty
+    df["Unit of Qty"] = units[product]
+    df["Sale Value"] = sale
+    df["Tax Value"] = tax
+    df["Total Value"] = (sale + tax).round(2)
+
+    if messy:
+        padded = rng.random(rows) < messy
+        df.loc[padded, "Product"] = " " + df.loc[padded, "Product"] + " "
+        for col in ("Customer Place", "Qty", "Unit of Qty"):
+            df.loc[rng.random(rows) < messy / 2, col] = None
+    return df[UPLOAD_COLUMNS].sort_values("Date", kind="stable", ignore_index=True)
+
+# Written with openpyxl's write-only mode, which streams rows to disk.
+def write_xlsx(df: pd.DataFrame, path: str) -> None:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sales")
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        sheet.append([None if pd.isna(value) else value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+                      for value in row])
+    workbook.save(path)
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": lambda df, path: df.to_csv(path, index=False),
+    "parquet": lambda df, path: df.to_parquet(path, index=False),
+}
+
+# === A set of monthly upload files ===
+# Months run consecutively from `start`, so the files span financial years
+# once there are more than twelve of them. Returns the written paths.
+def write_uploads(out_dir: str, files: int, rows_per_file: int, fmt: str = "xlsx", start: str = "2022-04",
+                  customer_count: int = 2_000, seed: int = 0) -> list:
+    os.makedirs(out_dir, exist_ok=True)
+    customer_table = customers(customer_count, seed)
+    paths = []
+    for index in range(files):
+        month = pd.Period(start, freq="M") + index
+        df = sales_register(rows_per_file, month, customer_table, seed=seed + index + 1)
+        path = os.path.join(out_dir, f"sales_{month.strftime('%Y_%m')}.{fmt}")
+        WRITERS[fmt](df, path)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic monthly GST sales registers")
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per file")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="xlsx")
+    parser.add_argument("--start", default="2022-04", help="first month, YYYY-MM")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    for path in write_uploads(args.out, args.files, args.rows, args.format, args.start, seed=args.seed):
+        print(path, f"{os.path.getsize(path) / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
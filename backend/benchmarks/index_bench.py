@@ -0,0 +1,169 @@
+# backend/benchmarks/index_bench.py
+#
+# Seeds a scratch schema in a local Postgres with synthetic sale_records rows
+# and compares EXPLAIN ANALYZE plans of the queries the DB backend runs, first
+# with only the primary key / id index and then with the composite indexes
+# declared on models.SaleRecord. The scratch schema is dropped afterwards.
+#
+#   cd backend && DATABASE_URL=postgresql+asyncpg://postgres:pw@localhost/tax_dashboard \
+#       python -m benchmarks.index_bench --rows 1000000 --users 50
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+
+import asyncpg
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database import DATABASE_URL
+from models import SaleRecord
+
+SCHEMA = "index_bench"
+SEED_BATCH = 50_000
+BASELINE_INDEXES = {"ix_sale_records_id"}
+
+QUERIES = {
+    "summary fy+month": (
+        'SELECT month, financial_year, product, sum(qty), sum(sale_value), sum(tax_value), '
+        'sum(total_value), avg(tax_rate) FROM sale_records '
+        'WHERE "user" = $1 AND financial_year = $2 AND month = $3 '
+        'GROUP BY month, financial_year, product',
+        lambda p: [p["user"], p["financial_year"], p["month"]],
+    ),
+    "summary fy": (
+        'SELECT month, financial_year, product, sum(qty), sum(sale_value), sum(tax_value), '
+        'sum(total_value), avg(tax_rate) FROM sale_records '
+        'WHERE "user" = $1 AND financial_year = $2 '
+        'GROUP BY month, financial_year, product',
+        lambda p: [p["user"], p["financial_year"]],
+    ),
+    "summary all": (
+        'SELECT month, financial_year, product, sum(qty), sum(sale_value), sum(tax_value), '
+        'sum(total_value), avg(tax_rate) FROM sale_records WHERE "user" = $1 '
+        'GROUP BY month, financial_year, product',
+        lambda p: [p["user"]],
+    ),
+    "preview page": (
+        'SELECT * FROM sale_records WHERE "user" = $1 AND id > $2 ORDER BY id LIMIT 100',
+        lambda p: [p["user"], p["cursor"]],
+    ),
+    "reset scan": (
+        'SELECT count(*) FROM sale_records WHERE "user" = $1',
+        lambda p: [p["user"]],
+    ),
+}
+
+COLUMNS = [
+    "user", "customer_code", "customer_name", "customer_place", "location_of_supply", "date",
+    "product", "tax_rate", "qty", "unit_of_qty", "sale_value", "tax_value", "total_value",
+    "financial_year", "month", "year",
+]
+
+def synthetic_rows(count: int, users: int, rng: random.Random):
+    start = datetime.date(2021, 4, 1)
+    for _ in range(count):
+        day = start + datetime.timedelta(days=rng.randrange(365 * 3))
+        fy_start = day.year - 1 if day.month <= 3 else day.year
+        rate = rng.choice([0.0, 5.0, 12.0, 18.0, 28.0])
+        sale = round(rng.uniform(100, 100_000), 2)
+        tax = round(sale * rate / 100, 2)
+        yield (
+            f"user_{rng.randrange(users)}", str(rng.randrange(1000, 99999)), f"Customer {rng.randrange(500)}",
+            "Mumbai", "MH", day, f"Product {rng.randrange(40)}", rate, float(rng.randrange(1, 500)), "nos",
+            sale, tax, sale + tax, f"{fy_start}-{fy_start + 1}", day.strftime("%B"), day.year,
+        )
+
+async def seed(conn, rows: int, users: int) -> float:
+    rng = random.Random(0)
+    started = time.perf_counter()
+    remaining = rows
+    while remaining:
+        batch = list(synthetic_rows(min(SEED_BATCH, remaining), users, rng))
+        await conn.copy_records_to_table("sale_records", records=batch, columns=COLUMNS, schema_name=SCHEMA)
+        remaining -= len(batch)
+    return time.perf_counter() - started
+
+def plan_nodes(plan: dict) -> list:
+    nodes = [plan["Node Type"] + (f" using {plan['Index Name']}" if "Index Name" in plan else "")]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+async def explain(conn, params: dict, repeat: int) -> dict:
+    results = {}
+    for name, (sql, args) in QUERIES.items():
+        best = None
+        for _ in range(repeat):
+            raw = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *args(params))
+            report = json.loads(raw)[0]
+            if best is None or report["Execution Time"] < best["Execution Time"]:
+                best = report
+        plan = best["Plan"]
+        results[name] = {
+            "ms": round(best["Execution Time"], 3),
+            "shared_hit": plan.get("Shared Hit Blocks", 0),
+            "shared_read": plan.get("Shared Read Blocks", 0),
+            "nodes": [node for node in plan_nodes(plan) if "Scan" in node],
+        }
+    return results
+
+async def create_indexes(conn, names=None):
+    dialect = postgresql.dialect()
+    for index in SaleRecord.__table__.indexes:
+        if names is None or index.name in names:
+            await conn.execute(str(CreateIndex(index).compile(dialect=dialect)))
+    await conn.execute("ANALYZE sale_records")
+
+async def run(args):
+    dsn = os.getenv("DATABASE_URL", DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        await conn.execute(f"SET search_path TO {SCHEMA}")
+        await conn.execute(str(CreateTable(SaleRecord.__table__).compile(dialect=postgresql.dialect())))
+
+        seconds = await seed(conn, args.rows, args.users)
+        print(f"seeded {args.rows:,} rows for {args.users} users in {seconds:.1f}s")
+
+        params = {
+            "user": "user_7",
+            "financial_year": "2022-2023",
+            "month": "March",
+            "cursor": await conn.fetchval('SELECT percentile_disc(0.5) WITHIN GROUP (ORDER BY id) FROM sale_records WHERE "user" = $1', "user_7"),
+        }
+        await create_indexes(conn, BASELINE_INDEXES)
+        before = await explain(conn, params, args.repeat)
+        await create_indexes(conn, {index.name for index in SaleRecord.__table__.indexes} - BASELINE_INDEXES)
+        after = await explain(conn, params, args.repeat)
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    print(f"{'query':<18}{'before ms':>11}{'after ms':>10}{'speedup':>9}  plan before -> after")
+    for name in QUERIES:
+        b, a = before[name], after[name]
+        speedup = b["ms"] / a["ms"] if a["ms"] else float("inf")
+        print(f"{name:<18}{b['ms']:>11.2f}{a['ms']:>10.2f}{speedup:>8.1f}x  {', '.join(b['nodes'])} -> {', '.join(a['nodes'])}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": args.rows, "users": args.users, "before": before, "after": after}, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sale_records query plans before and after the composite indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the raw results to this file")
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema after the run")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# backend/benchmarks/parquet_bench.py
+#
+# Compares a full read of a merged file written the old way (df.to_parquet)
+# with a projected, filtered read of the same data written by
+# storage.write_merged. Reports latency and the bytes pulled from disk.
+#
+#   cd backend && python -m benchmarks.parquet_bench --rows 2000000
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import enrich
+import storage
+import summary
+
+class CountingFile(io.RawIOBase):
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        self.bytes_read = 0
+
+    def readinto(self, buffer) -> int:
+        data = self._f.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+def make_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    sale = rng.integers(100, 100_000, rows)
+    rate = rng.choice([0.0, 5.0, 12.0, 18.0, 28.0], rows)
+    df = pd.DataFrame({
+        "Customer Code": rng.integers(1000, 99999, rows).astype(str),
+        "Customer Name": rng.choice([f"Customer {i}" for i in range(500)], rows),
+        "Customer Place": rng.choice(["Mumbai", "Pune", "Delhi", "Chennai"], rows),
+        "Location of Supply": rng.choice(["MH", "DL", "TN", "KA"], rows),
+        "Date": pd.Timestamp("2021-04-01") + pd.to_timedelta(rng.integers(0, 365 * 3, rows), unit="D"),
+        "Product": rng.choice([f"Product {i}" for i in range(40)], rows),
+        "Tax Rate": rate,
+        "Qty": rng.integers(1, 500, rows),
+        "Unit of Qty": rng.choice(["kg", "nos", "ltr"], rows),
+        "Sale Value": sale,
+        "Tax Value": (sale * rate / 100).round(2),
+        "Total Value": sale,
+    })
+    enrich.add_date_columns(df)
+    df["Invoice Value"] = df["Sale Value"] + df["Tax Value"]
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def measure(path: str, repeat: int, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        f = CountingFile(path)
+        started = time.perf_counter()
+        df = pq.read_table(f, **kwargs).to_pandas()
+        best = min(best, time.perf_counter() - started)
+        f.close()
+    return best, f.bytes_read, len(df)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merged Parquet reads")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--financial-year", default="2022-2023")
+    parser.add_argument("--month", default="")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_dataset(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.parquet")
+        merged_path = os.path.join(tmp, "merged.parquet")
+        df.to_parquet(legacy_path, index=False)
+        storage.write_merged(df, merged_path)
+
+        filters = storage.dataset_filters(args.month, args.financial_year)
+        cases = [
+            ("full read (legacy file)", legacy_path, {}),
+            ("columns only", merged_path, {"columns": summary.SOURCE_COLUMNS}),
+            ("columns + filters", merged_path, {"columns": summary.SOURCE_COLUMNS, "filters": filters}),
+        ]
+
+        print(f"rows: {args.rows:,}  filters: {filters}")
+        print(f"legacy file: {os.path.getsize(legacy_path) / 1e6:.1f} MB ({pq.ParquetFile(legacy_path).num_row_groups} row groups)")
+        print(f"merged file: {os.path.getsize(merged_path) / 1e6:.1f} MB ({pq.ParquetFile(merged_path).num_row_groups} row groups)")
+        print(f"{'case':<26}{'latency':>10}{'MB read':>10}{'rows':>12}")
+        for name, path, kwargs in cases:
+            seconds, bytes_read, rows = measure(path, args.repeat, **kwargs)
+            print(f"{name:<26}{seconds * 1000:>8.1f}ms{bytes_read / 1e6:>10.1f}{rows:>12,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# backend/benchmarks/pipeline_bench.py
+#
+# End-to-end benchmark of upload -> merge -> preview -> summary -> download,
+# driven through FastAPI's TestClient against both apps:
+#
+#   parquet  backend/main.py, merged Parquet files on disk
+#   db       main.py at the repo root, rows in sale_records (a scratch SQLite
+#            database unless --db-url points at Postgres)
+#
+# Both apps get the same generated upload files (benchmarks/gst_data.py).
+# Each app runs in its own process, because the two trees share module
+# names, and so each app's peak memory is measured on its own. The results
+# (throughput, latency percentiles, peak RSS) are written as JSON. --compare
+# prints the change against an earlier results file.
+#
+#   cd backend && python -m benchmarks.pipeline_bench --files 6 --rows 20000 --json run.json
+#   cd backend && python -m benchmarks.pipeline_bench --files 6 --rows 20000 --compare run.json
+
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy.engine import make_url
+
+from . import gst_data
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIRS = {"parquet": BACKEND_DIR, "db": os.path.dirname(BACKEND_DIR)}
+USER = "bench"
+
+SUMMARY_FILTERS = [
+    {},
+    {"financial_year": "2022-2023"},
+    {"month": "April"},
+    {"product": "rice"},
+    {"tax_rate": 18},
+    {"financial_year": "2022-2023", "product": "soap"},
+]
+DOWNLOAD_FORMATS = ["csv", "xlsx"]
+
+def latency_stats(samples: list) -> dict:
+    ms = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p90_ms": round(float(np.percentile(ms, 90)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+def _memory_mb() -> dict:
+    values = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, kb = line.split()[:2]
+                values[name.rstrip(":")] = round(int(kb) / 1024, 1)
+    return {"rss_mb": values.get("VmRSS"), "peak_rss_mb": values.get("VmHWM")}
+
+def timed(client, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    response = client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+    return elapsed, response
+
+# === App setup, inside the worker process ===
+def _open_app(name: str, db_url: str):
+    sys.path.insert(0, APP_DIRS[name])
+    if name == "parquet":
+        import main
+        return main.app, main.create_access_token({"sub": USER})
+
+    os.environ["DATABASE_URL"] = db_url
+    import database
+    import main
+    import utils
+
+    async def create_tables():
+        async with database.engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.create_all)
+        await database.engine.dispose()
+
+    asyncio.run(create_tables())
+    return main.app, utils.create_access_token({"sub": USER})
+
+def run_steps(client, headers: dict, paths: list, repeat: int) -> dict:
+    steps = {}
+
+    upload_bytes = sum(os.path.getsize(path) for path in paths)
+    files = [("files", (os.path.basename(path), open(path, "rb"))) for path in paths]
+    try:
+        seconds, _ = timed(client, "POST", "/upload", files=files, headers=headers)
+    finally:
+        for _, (_, handle) in files:
+            handle.close()
+    steps["upload"] = {"seconds": round(seconds, 3), "bytes": upload_bytes,
+                       "mb_per_sec": round(upload_bytes / 1e6 / seconds, 2), **_memory_mb()}
+
+    started = time.perf_counter()
+    _, response = timed(client, "GET", "/merge", headers=headers)
+    job = response.json()
+    while job["status"] in ("queued", "running"):
+        time.sleep(0.05)
+        job = client.get(f"/merge/{job['job_id']}", headers=headers).json()
+    seconds = time.perf_counter() - started
+    if job["status"] != "done":
+        raise RuntimeError(f"merge failed: {job.get('error')}")
+    rows = job["rows"]
+    steps["merge"] = {"seconds": round(seconds, 3), "rows": rows,
+                      "rows_per_sec": round(rows / seconds, 1), **_memory_mb()}
+
+    samples, cursor = [], None
+    for _ in range(repeat):
+        params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+        seconds, response = timed(client, "GET", "/preview", params=params, headers=headers)
+        samples.append(seconds)
+        cursor = response.headers.get("X-Next-Cursor")
+    steps["preview"] = {**latency_stats(samples), **_memory_mb()}
+
+    samples = []
+    for index in range(repeat):
+        seconds, _ = timed(client, "GET", "/summary", params=SUMMARY_FILTERS[index % len(SUMMARY_FILTERS)], headers=headers)
+        samples.append(seconds)
+    steps["summary"] = {**latency_stats(samples), **_memory_mb()}
+
+    # The first download of a format writes the export; later ones are
+    # served from the cached file until the next merge.
+    for fmt in DOWNLOAD_FORMATS:
+        cold, response = timed(client, "GET", "/download", params={"format": fmt}, headers=headers)
+        warm = [timed(client, "GET", "/download", params={"format": fmt}, headers=headers)[0] for _ in range(3)]
+        steps[f"download_{fmt}"] = {"cold_seconds": round(cold, 3), "bytes": len(response.content),
+                                    "rows_per_sec": round(rows / cold, 1), "cached": latency_stats(warm), **_memory_mb()}
+
+    timed(client, "DELETE", "/reset", headers=headers)
+    return steps
+
+def run_backend(name: str, paths: list, workdir: str, db_url: str, repeat: int, results) -> None:
+    try:
+        os.chdir(workdir)
+        from fastapi.testclient import TestClient
+
+        app, token = _open_app(name, db_url)
+        with TestClient(app) as client:
+            results.put({"steps": run_steps(client, {"Authorization": f"Bearer {token}"}, paths, repeat)})
+    except Exception as exc:
+        results.put({"error": f"{type(exc).__name__}: {exc}"})
+
+# === Reporting ===
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def headline(step: dict) -> float:
+    if "p50_ms" in step:
+        return step["p50_ms"]
+    return (step.get("seconds") or step.get("cold_seconds")) * 1000
+
+def print_report(report: dict, previous: dict = None) -> None:
+    print(f"{'backend':<9}{'step':<15}{'ms':>10}{'throughput':>16}{'peak MB':>9}" + ("   vs previous" if previous else ""))
+    for backend, result in report["backends"].items():
+        if "error" in result:
+            print(f"{backend:<9}failed: {result['error']}")
+            continue
+        for step_name, step in result["steps"].items():
+            if "rows_per_sec" in step:
+                throughput = f"{step['rows_per_sec']:,.0f} rows/s"
+            elif "mb_per_sec" in step:
+                throughput = f"{step['mb_per_sec']:,.1f} MB/s"
+            else:
+                throughput = f"p99 {step['p99_ms']:.1f} ms"
+            line = f"{backend:<9}{step_name:<15}{headline(step):>10.1f}{throughput:>16}{step['peak_rss_mb']:>9.1f}"
+            old = (previous or {}).get("backends", {}).get(backend, {}).get("steps", {}).get(step_name)
+            if old:
+                line += f"   {headline(old):.1f} ms -> {headline(step) / headline(old):.2f}x"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload/merge/preview/summary/download benchmark for both backends")
+    parser.add_argument("--files", type=int, default=6, help="monthly upload files")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per file")
+    parser.add_argument("--format", choices=sorted(gst_data.WRITERS), default="xlsx")
+    parser.add_argument("--backends", default="parquet,db")
+    parser.add_argument("--db-url", help="database for the db backend; defaults to a scratch SQLite file")
+    parser.add_argument("--repeat", type=int, default=50, help="requests per preview and summary step")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "started": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "files": args.files,
+            "rows_per_file": args.rows,
+            "format": args.format,
+            "repeat": args.repeat,
+        },
+        "backends": {},
+    }
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="pipeline_bench_") as workdir:
+        started = time.perf_counter()
+        paths = gst_data.write_uploads(os.path.join(workdir, "inputs"), args.files, args.rows, args.format, seed=args.seed)
+        print(f"generated {args.files} x {args.rows:,} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        for name in args.backends.split(","):
+            app_dir = os.path.join(workdir, name)
+            os.makedirs(app_dir)
+            db_url = args.db_url or f"sqlite+aiosqlite:///{os.path.join(app_dir, 'bench.db')}"
+            if name == "db":
+                report["meta"]["db_url"] = make_url(db_url).render_as_string(hide_password=True)
+            results = context.Queue()
+            worker = context.Process(target=run_backend, args=(name, paths, app_dir, db_url, args.repeat, results))
+            worker.start()
+            report["backends"][name] = results.get()
+            worker.join()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(report, previous)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
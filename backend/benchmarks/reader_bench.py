@@ -0,0 +1,78 @@
+# backend/benchmarks/reader_bench.py
+#
+# Generates a synthetic GST workbook (plus CSV and Parquet copies of it, and
+# a few columns the app never uses) and times every reader in readers.py
+# against the plain pd.read_excel call /merge used before. calamine is only
+# measured when python-calamine is installed.
+#
+#   cd backend && python -m benchmarks.reader_bench --rows 200000
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import export
+import readers
+from .parquet_bench import make_dataset
+
+RAW_COLUMNS = [
+    "Customer Code", "Customer Name", "Customer Place", "Location of Supply", "Date", "Product",
+    "Tax Rate", "Qty", "Unit of Qty", "Sale Value", "Tax Value", "Total Value",
+]
+
+def write_inputs(rows: int, workdir: str) -> dict:
+    df = make_dataset(rows)[RAW_COLUMNS]
+    df = df.assign(Remarks="n/a", Salesperson="Team A", Warehouse="WH-1")
+    paths = {fmt: os.path.join(workdir, f"sales.{fmt}") for fmt in ("xlsx", "csv", "parquet")}
+    started = time.perf_counter()
+    export.export_frame(df, paths["xlsx"], "xlsx")
+    print(f"wrote {rows:,}-row workbook in {time.perf_counter() - started:.1f}s")
+    df.to_csv(paths["csv"], index=False)
+    df.to_parquet(paths["parquet"], index=False)
+    return paths
+
+def timed(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare upload readers on a generated workbook")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_inputs(args.rows, workdir)
+        cases = [
+            ("xlsx  pd.read_excel (before)", lambda: pd.read_excel(paths["xlsx"])),
+            ("xlsx  openpyxl, used columns", lambda: readers.apply_dtypes(readers.read_excel(paths["xlsx"], engine="openpyxl"))),
+        ]
+        if readers.HAS_CALAMINE:
+            cases.append(("xlsx  calamine, used columns", lambda: readers.read_file(paths["xlsx"])))
+        cases += [
+            ("csv   pd.read_csv", lambda: pd.read_csv(paths["csv"])),
+            ("csv   pyarrow, used columns", lambda: readers.read_file(paths["csv"])),
+            ("parquet pass-through", lambda: readers.read_file(paths["parquet"])),
+        ]
+
+        print(f"{'reader':<32}{'seconds':>9}{'rows/s':>12}{'cols':>6}{'MB in memory':>14}")
+        baseline = None
+        for name, fn in cases:
+            seconds, df = timed(fn, args.repeat)
+            baseline = baseline or seconds
+            mb = df.memory_usage(deep=True).sum() / 1e6
+            print(f"{name:<32}{seconds:>9.2f}{len(df) / seconds:>12,.0f}{df.shape[1]:>6}{mb:>14.1f}"
+                  f"   {baseline / seconds:.1f}x")
+        if not readers.HAS_CALAMINE:
+            print("python-calamine is not installed; calamine was not measured")
+
+if __name__ == "__main__":
+    main()
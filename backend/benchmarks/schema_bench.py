@@ -0,0 +1,88 @@
+# backend/benchmarks/schema_bench.py
+#
+# Size of the merged dataset before and after storage.MERGED_SCHEMA: on disk,
+# and in memory once loaded back into pandas. "Before" is write_merged as it
+# was before the canonical schema: the same sort and row groups, but with the
+# dtypes pandas inferred (object strings) and snappy compression.
+#
+#   cd backend && python -m benchmarks.schema_bench --rows 1000000
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+import readers
+import storage
+from .parquet_bench import make_dataset
+
+def parsed_frame(rows: int) -> pd.DataFrame:
+    # What parsing.load_file hands to /merge: object text columns and float64 numbers.
+    df = make_dataset(rows)
+    for col in readers.TEXT_COLUMNS + ["Month", "Quarter"]:
+        df[col] = df[col].astype(object)
+    return readers.apply_dtypes(df)
+
+@contextlib.contextmanager
+def previous_layout():
+    to_table, compression = storage.to_table, storage.PARQUET_COMPRESSION
+    storage.to_table = lambda df: pa.Table.from_pandas(df, preserve_index=False)
+    storage.PARQUET_COMPRESSION = "snappy"
+    try:
+        yield
+    finally:
+        storage.to_table, storage.PARQUET_COMPRESSION = to_table, compression
+
+def write_previous(df: pd.DataFrame, path: str) -> None:
+    with previous_layout():
+        storage.write_merged(df, path)
+
+def measure(write, read, path: str) -> dict:
+    started = time.perf_counter()
+    write(path)
+    write_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    df = read(path)
+    read_seconds = time.perf_counter() - started
+    return {
+        "disk_mb": os.path.getsize(path) / 1e6,
+        "memory_mb": df.memory_usage(deep=True).sum() / 1e6,
+        "write_s": write_seconds,
+        "read_s": read_seconds,
+        "dtypes": df.dtypes.astype(str).to_dict(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Merged dataset size before and after the canonical schema")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dtypes", action="store_true", help="print the column dtypes of both layouts")
+    args = parser.parse_args()
+
+    df = parsed_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = measure(
+            lambda path: write_previous(df, path),
+            pd.read_parquet,
+            os.path.join(tmp, "before.parquet"),
+        )
+        after = measure(
+            lambda path: storage.write_merged(df, path),
+            storage.read_merged,
+            os.path.join(tmp, "after.parquet"),
+        )
+
+    print(f"rows: {args.rows:,}  parsed frame in memory: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    print(f"{'layout':<10}{'disk MB':>10}{'memory MB':>11}{'write s':>9}{'read s':>8}")
+    for name, result in (("before", before), ("after", after)):
+        print(f"{name:<10}{result['disk_mb']:>10.1f}{result['memory_mb']:>11.1f}{result['write_s']:>9.2f}{result['read_s']:>8.2f}")
+    print(f"disk {before['disk_mb'] / after['disk_mb']:.1f}x smaller, memory {before['memory_mb'] / after['memory_mb']:.1f}x smaller")
+    if args.dtypes:
+        for col in after["dtypes"]:
+            print(f"  {col:<20}{before['dtypes'].get(col, '-'):>16} -> {after['dtypes'][col]}")
+
+if __name__ == "__main__":
+    main()
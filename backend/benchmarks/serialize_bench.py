@@ -0,0 +1,54 @@
+# backend/benchmarks/serialize_bench.py
+#
+# Times the /preview and /summary serialization paths on a page of merged
+# rows: the previous df.to_dict() + jsonable_encoder + JSONResponse, the
+# orjson records path and the Arrow IPC stream from responses.py.
+#
+#   cd backend && python -m benchmarks.serialize_bench --rows 50000
+
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import responses
+import storage
+from .schema_bench import parsed_frame
+
+def timed(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization for merged rows")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "merged.parquet")
+        storage.write_merged(parsed_frame(args.rows), path)
+        df, _ = storage.read_rows(path, 0, args.rows)
+
+    cases = [
+        ("to_dict + jsonable_encoder", lambda: JSONResponse(jsonable_encoder(df.to_dict(orient="records"))).body),
+        ("orjson records", lambda: responses.records_json(df)),
+        ("arrow ipc stream", lambda: responses.arrow_stream(df)),
+    ]
+    print(f"{'serializer':<30}{'seconds':>9}{'rows/s':>12}{'MB':>8}")
+    baseline = None
+    for name, fn in cases:
+        seconds, body = timed(fn, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<30}{seconds:>9.3f}{len(df) / seconds:>12,.0f}{len(body) / 1e6:>8.1f}   {baseline / seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# backend/cache.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import storage
+
+# === Config ===
+# Upper bound on the in-memory size of all cached cubes, in bytes.
+DATASET_CACHE_BYTES = int(os.getenv("DATASET_CACHE_BYTES", 512 * 1024 * 1024))
+
+# === Per-user summary cache ===
+# Keeps recently used summary cubes decoded in memory, evicting the least
+# recently used ones once the byte budget is exceeded. Only /summary reads
+# through it, under the key "<user>/summary"; /preview and /download read the
+# merged file directly with column and row-group filters, and their responses
+# are cached by dataset version in etags and export instead. Entries are also
+# checked against the file's mtime, so a merge done by another worker process
+# is never served stale. Cached frames are shared between requests and must
+# not be modified in place.
+class DatasetCache:
+    def __init__(self, max_bytes: int = DATASET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, path: str) -> pd.DataFrame:
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == (path, mtime):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        df = storage.read_merged(path)
+        df.columns = [col.strip() for col in df.columns]
+        self.put(key, (path, mtime), df)
+        return df
+
+    def put(self, key: str, version, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (version, df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.current_bytes -= entry[2]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+datasets = DatasetCache()
@@ -0,0 +1,115 @@
+# backend/duckdb_engine.py
+
+import importlib.util
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+import summary
+
+# === Config ===
+# SUMMARY_ENGINE selects how /summary is answered: "pandas" uses the cube
+# written by /merge (or the merged file when there is no cube), "duckdb" runs
+# the filters and group-by as SQL over the merged Parquet file.
+SUMMARY_ENGINE = os.getenv("SUMMARY_ENGINE", "pandas").lower()
+DUCKDB_POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", 4))
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", os.cpu_count() or 1))
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "1GB")
+
+HAS_DUCKDB = importlib.util.find_spec("duckdb") is not None
+
+if SUMMARY_ENGINE not in ("pandas", "duckdb"):
+    raise ValueError(f"SUMMARY_ENGINE must be 'pandas' or 'duckdb', not {SUMMARY_ENGINE!r}")
+if SUMMARY_ENGINE == "duckdb" and not HAS_DUCKDB:
+    raise ValueError("SUMMARY_ENGINE=duckdb needs the duckdb package installed")
+
+def enabled() -> bool:
+    return SUMMARY_ENGINE == "duckdb"
+
+# === Connection pool ===
+# One in-process, in-memory database per worker; each request borrows one of
+# its cursors, so queries from different threads run side by side without
+# sharing a connection. The database is opened on first use.
+class ConnectionPool:
+    def __init__(self, size: int = DUCKDB_POOL_SIZE):
+        self.size = size
+        self._database = None
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _open(self):
+        import duckdb
+
+        with self._lock:
+            if self._database is None:
+                database = duckdb.connect(":memory:", config={
+                    "threads": DUCKDB_THREADS,
+                    "memory_limit": DUCKDB_MEMORY_LIMIT,
+                })
+                for _ in range(self.size):
+                    self._idle.put(database.cursor())
+                self._database = database
+
+    @contextmanager
+    def connection(self):
+        if self._database is None:
+            self._open()
+        cursor = self._idle.get()
+        try:
+            yield cursor
+        finally:
+            self._idle.put(cursor)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._database is not None:
+                while not self._idle.empty():
+                    self._idle.get_nowait().close()
+                self._database.close()
+                self._database = None
+
+pool = ConnectionPool()
+
+# === /summary as SQL ===
+# Mirrors summary.filter_rows followed by a group-by on the merged rows:
+# text filters compare trimmed, lower-cased values, rows with a missing group
+# key are dropped, empty sums are 0 and Tax Rate is the mean of the rows that
+# have one. When filtering by product the stripped product name is reported.
+# Rounding happens in pandas so both engines round the same way.
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def summary_sql(month: str = "", financial_year: str = "", product: str = "", tax_rate: float = None):
+    month_col, year_col, product_col, rate_col = (_quote(col) for col in ["Month", "Financial Year", "Product", "Tax Rate"])
+    product_key = f"trim(CAST({product_col} AS VARCHAR))" if product else product_col
+    conditions, params = [], []
+    if month:
+        conditions.append(f"lower(trim({month_col})) = ?")
+        params.append(month.lower().strip())
+    if financial_year:
+        conditions.append(f"trim(CAST({year_col} AS VARCHAR)) = ?")
+        params.append(financial_year.strip())
+    if product:
+        conditions.append(f"lower({product_key}) = ?")
+        params.append(product.lower().strip())
+    if tax_rate is not None:
+        conditions.append(f"{rate_col} = ?")
+        params.append(tax_rate)
+    conditions += [f"{month_col} IS NOT NULL", f"{year_col} IS NOT NULL", f"{product_col} IS NOT NULL"]
+
+    sums = ", ".join(f"coalesce(sum({_quote(col)}), 0) AS {_quote(col)}" for col in summary.SUM_COLUMNS)
+    sql = (
+        f"SELECT {month_col}, {year_col}, {product_key} AS {product_col}, {sums}, avg({rate_col}) AS {rate_col} "
+        f"FROM read_parquet(?) WHERE {' AND '.join(conditions)} "
+        f"GROUP BY ALL ORDER BY 1, 2, 3"
+    )
+    return sql, params
+
+def summarize(path: str, month: str = "", financial_year: str = "", product: str = "", tax_rate: float = None) -> pd.DataFrame:
+    sql, params = summary_sql(month, financial_year, product, tax_rate)
+    with pool.connection() as con:
+        result = con.execute(sql, [path, *params]).df()
+    return result.round(2)
@@ -0,0 +1,165 @@
+# backend/edits.py
+
+import json
+import os
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+import enrich
+import storage
+import summary
+
+# === Config ===
+# Pending edited rows that trigger a background compaction after /save-edits.
+# Below it, edits stay in the log and are applied as rows are read.
+EDITS_COMPACT_ROWS = int(os.getenv("EDITS_COMPACT_ROWS", 1000))
+
+# === Edit logs ===
+# /save-edits appends one JSON line per edited row ({"id": ..., "changes":
+# {...}}) to the user's edit log instead of rewriting the merged file; /preview
+# applies the pending edits to the rows it returns and the summary cube is
+# updated in place. Compaction folds the log into the merged file and moves
+# it to the applied log, which /merge replays onto the rebuilt dataset, so
+# edits survive later merges for as long as the rows' source files do.
+#
+# While a compaction runs, its edits sit in the "compacting" file and saves
+# go to a fresh log; readers apply both. Edits set absolute values, so
+# applying one again to a row that already has it changes nothing.
+def log_path(base: str, user: str) -> str:
+    return os.path.join(base, f"{user}_edits.jsonl")
+
+def applied_path(base: str, user: str) -> str:
+    return os.path.join(base, f"{user}_edits_applied.jsonl")
+
+def _compacting_path(base: str, user: str) -> str:
+    return os.path.join(base, f"{user}_edits.compacting.jsonl")
+
+def paths(base: str, user: str) -> list:
+    return [log_path(base, user), _compacting_path(base, user), applied_path(base, user)]
+
+# Saves, compactions and merges of one user's dataset are serialized within
+# the process; /save-edits refuses to run while a merge is active.
+_locks = defaultdict(threading.Lock)
+_locks_guard = threading.Lock()
+
+def lock(user: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks[user]
+
+def append_log(path: str, changes: dict) -> None:
+    lines = "".join(
+        json.dumps({"id": row_id, "changes": values}) + "\n"
+        for row_id, values in changes.items()
+    )
+    with open(path, "a") as f:
+        f.write(lines)
+
+# Later lines win, column by column.
+def read_log(path: str, changes: dict = None) -> dict:
+    changes = {} if changes is None else changes
+    if not os.path.exists(path):
+        return changes
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                changes.setdefault(entry["id"], {}).update(entry["changes"])
+    return changes
+
+def pending(base: str, user: str) -> dict:
+    return read_log(log_path(base, user), read_log(_compacting_path(base, user)))
+
+def has_pending(base: str, user: str) -> bool:
+    return os.path.exists(log_path(base, user)) or os.path.exists(_compacting_path(base, user))
+
+def overlay(df: pd.DataFrame, changes: dict) -> pd.DataFrame:
+    if not changes or storage.ROW_ID not in df.columns:
+        return df
+    return enrich.apply_changes(df, df[storage.ROW_ID], changes)
+
+# === Save a batch of edits ===
+# `edits` are schemas.EditedRow objects. The edited rows are read from the
+# merged file (with the pending edits applied) to update the cube, then the
+# changes are appended to the log. Returns the number of rows updated, the
+# ids not found, and the number of rows now pending compaction.
+def save(base: str, user: str, merged_path: str, edits: list) -> dict:
+    changes = {}
+    for edit in edits:
+        changes.setdefault(edit.id, {}).update(edit.changes())
+    if not changes:
+        return {"updated": 0, "missing": [], "pending": 0}
+
+    with lock(user):
+        old = storage.read_merged(merged_path, filters=[(storage.ROW_ID, "in", list(changes))])
+        found = set(old[storage.ROW_ID].tolist())
+        missing = sorted(set(changes) - found)
+        changes = {row_id: values for row_id, values in changes.items() if row_id in found}
+        if not changes:
+            return {"updated": 0, "missing": missing, "pending": 0}
+
+        old = overlay(old, pending(base, user))
+        cube_file = summary.cube_path(base, user)
+        if os.path.exists(cube_file):
+            cube = storage.read_merged(cube_file)
+            storage.write_merged(summary.update_cube(cube, old, overlay(old, changes)), cube_file)
+        append_log(log_path(base, user), changes)
+        return {"updated": len(changes), "missing": missing, "pending": len(pending(base, user))}
+
+# === Compaction ===
+# Rewrites the merged file with the pending edits applied and moves them to
+# the applied log. The cube already reflects them. Returns the number of
+# edited rows folded in.
+def compact(base: str, user: str, merged_path: str) -> int:
+    with lock(user):
+        log_file, compacting_file = log_path(base, user), _compacting_path(base, user)
+        if os.path.exists(log_file):
+            if os.path.exists(compacting_file):
+                # Left over from an interrupted compaction: fold both in.
+                with open(log_file) as src, open(compacting_file, "a") as dst:
+                    dst.write(src.read())
+                os.remove(log_file)
+            else:
+                os.replace(log_file, compacting_file)
+        changes = read_log(compacting_file)
+        if not changes:
+            return 0
+        if os.path.exists(merged_path):
+            df = storage.read_merged(merged_path)
+            storage.write_merged(overlay(df, changes), merged_path)
+        _save_applied(base, user, read_log(compacting_file, read_log(applied_path(base, user))))
+        os.remove(compacting_file)
+        return len(changes)
+
+# === Replay on merge ===
+# /merge rebuilds the dataset from the uploads; every edit made so far is
+# applied to it, and the applied log is rewritten to the ids still present.
+# Call with lock(user) held.
+def _all_changes(base: str, user: str) -> dict:
+    changes = read_log(applied_path(base, user))
+    for path in (_compacting_path(base, user), log_path(base, user)):
+        read_log(path, changes)
+    return changes
+
+def replay(base: str, user: str, df: pd.DataFrame) -> pd.DataFrame:
+    return overlay(df, _all_changes(base, user))
+
+def mark_applied(base: str, user: str, row_ids) -> None:
+    live = set(row_ids)
+    _save_applied(base, user, {row_id: values for row_id, values in _all_changes(base, user).items() if row_id in live})
+    for path in (_compacting_path(base, user), log_path(base, user)):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _save_applied(base: str, user: str, changes: dict) -> None:
+    path = applied_path(base, user)
+    if not changes:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    append_log(tmp_path, changes)
+    os.replace(tmp_path, path)
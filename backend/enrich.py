@@ -0,0 +1,102 @@
+# backend/enrich.py
+
+import calendar
+
+import numpy as np
+import pandas as pd
+
+# Categories are kept in alphabetical order so grouping and sorting on the
+# categorical columns gives the same row order as the plain strings did.
+MONTH_NAMES = sorted(calendar.month_name[1:])
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+
+# month number (1-12) -> code in MONTH_NAMES; index 0 is unused
+_MONTH_CODES = np.array([-1] + [MONTH_NAMES.index(calendar.month_name[m]) for m in range(1, 13)], dtype=np.int8)
+
+# === Financial year labels ===
+# Only a handful of distinct financial years exist in any upload, so labels are
+# built once per distinct start year and rows are mapped to them by code.
+def financial_year_labels(start_years: np.ndarray) -> pd.Categorical:
+    valid = ~np.isnan(start_years)
+    years = np.unique(start_years[valid]).astype(int)
+    codes = np.full(len(start_years), -1, dtype=np.int32)
+    codes[valid] = np.searchsorted(years, start_years[valid].astype(int))
+    return pd.Categorical.from_codes(codes, categories=[f"{y}-{y + 1}" for y in years])
+
+# === Add Month / Year / Financial Year / Quarter derived from a date column ===
+# The financial year runs April-March, so Q1 is April-June. Rows whose date
+# cannot be parsed get missing values instead of raising.
+def add_date_columns(df: pd.DataFrame, column: str = "Date") -> pd.DataFrame:
+    dates = pd.to_datetime(df[column], errors="coerce")
+    valid = dates.notna().to_numpy()
+    month = dates.dt.month.to_numpy(dtype=float, na_value=np.nan)
+    year = dates.dt.year.to_numpy(dtype=float, na_value=np.nan)
+
+    month_codes = np.full(len(df), -1, dtype=np.int8)
+    month_codes[valid] = _MONTH_CODES[month[valid].astype(int)]
+    quarter_codes = np.full(len(df), -1, dtype=np.int8)
+    quarter_codes[valid] = ((month[valid].astype(int) - 4) % 12) // 3
+
+    df[column] = dates
+    df["Month"] = pd.Categorical.from_codes(month_codes, categories=MONTH_NAMES)
+    df["Year"] = pd.array(np.where(valid, year, np.nan), dtype="Int32")
+    df["Financial Year"] = financial_year_labels(np.where(month <= 3, year - 1, year))
+    df["Quarter"] = pd.Categorical.from_codes(quarter_codes, categories=QUARTERS)
+    return df
+
+# === Apply row edits ===
+# `ids` holds the row id of each row of `df`; `changes` maps a row id to the
+# {column: value} pairs to set on it. Columns that depend on an edited Date,
+# Sale Value or Tax Value are rebuilt for those rows, unless the edit sets
+# them itself. Changes to columns `df` does not have are ignored. Returns a
+# new frame; edited categorical columns come back as plain object columns.
+DATE_COLUMNS = ["Month", "Year", "Financial Year", "Quarter"]
+DERIVED_COLUMNS = DATE_COLUMNS + ["Invoice Value"]
+
+def _set_values(df: pd.DataFrame, column: str, positions: list, values: list) -> None:
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    else:
+        series = series.copy()
+    if column == "Date":
+        values = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce")
+        if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+            series = pd.to_datetime(series, errors="coerce")
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        values = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    series.iloc[positions] = list(values)
+    df[column] = series
+
+def apply_changes(df: pd.DataFrame, ids, changes: dict) -> pd.DataFrame:
+    positions = np.flatnonzero(pd.Series(ids).isin(list(changes)).to_numpy())
+    if not len(positions) or not changes:
+        return df
+
+    updates = {}
+    for position, row_id in zip(positions, np.asarray(ids)[positions]):
+        for column, value in changes[int(row_id)].items():
+            if column in df.columns:
+                updates.setdefault(column, ([], []))
+                updates[column][0].append(position)
+                updates[column][1].append(value)
+
+    df = df.copy(deep=False)
+    for column, (rows, values) in updates.items():
+        _set_values(df, column, rows, values)
+
+    if "Date" in updates:
+        rows = updates["Date"][0]
+        dated = add_date_columns(df.iloc[rows][["Date"]].copy())
+        for column in DATE_COLUMNS:
+            if column in df.columns:
+                _set_values(df, column, rows, dated[column].astype(object).tolist())
+    if {"Sale Value", "Tax Value"} & updates.keys() and {"Sale Value", "Tax Value", "Invoice Value"}.issubset(df.columns):
+        rows = sorted(set(updates.get("Sale Value", ([],))[0]) | set(updates.get("Tax Value", ([],))[0]))
+        totals = df["Sale Value"].iloc[rows] + df["Tax Value"].iloc[rows]
+        _set_values(df, "Invoice Value", rows, totals.tolist())
+
+    for column in DERIVED_COLUMNS:
+        if column in updates:
+            _set_values(df, column, *updates[column])
+    return df
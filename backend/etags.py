@@ -0,0 +1,170 @@
+# backend/etags.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# === Config ===
+# Upper bound on the size of all cached response bodies, in bytes.
+RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_BYTES", 64 * 1024 * 1024))
+# Query parameters that do not change the response body.
+IGNORED_PARAMS = {"profile"}
+
+# === Dataset versions ===
+# Each user's dataset carries a version, bumped by /merge, /reset and edits.
+# It is kept in a small file next to the merged data, so every worker process
+# sees the same value; the file holds the time of the last bump in
+# nanoseconds, which also serves as Last-Modified. A user without a version
+# file gets one on first read.
+def version_path(base: str, user: str) -> str:
+    return os.path.join(base, f"{user}_version")
+
+def bump_version(base: str, user: str) -> str:
+    path = version_path(base, user)
+    version = str(time.time_ns())
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    results.invalidate(user)
+    return version
+
+def current_version(base: str, user: str) -> str:
+    try:
+        with open(version_path(base, user)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return bump_version(base, user)
+
+# === Validators ===
+# The ETag covers the dataset version, the user, the path, the query string
+# (in sorted order) and the Accept header, since /summary and /preview can
+# answer with JSON or Arrow.
+def etag_for(request: Request, user: str, version: str) -> str:
+    params = sorted((name, value) for name, value in request.query_params.multi_items() if name not in IGNORED_PARAMS)
+    key = repr((version, user, request.url.path, params, request.headers.get("accept", "")))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+# If-None-Match takes precedence; If-Modified-Since is only used without it.
+def not_modified(request: Request, etag: str, modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+# === Result cache ===
+# Keeps recently served response bodies keyed by (user, ETag), evicting the
+# least recently used once the byte budget is exceeded. A version bump drops
+# the user's entries; entries for an old version could never match again.
+class ResultCache:
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user: str, etag: str):
+        with self._lock:
+            entry = self._entries.get((user, etag))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user, etag))
+            self.hits += 1
+            return entry
+
+    def put(self, user: str, etag: str, body: bytes, media_type: str, headers: dict) -> None:
+        size = len(body)
+        with self._lock:
+            self._drop((user, etag))
+            if size > self.max_bytes:
+                return
+            self._entries[(user, etag)] = (body, media_type, headers, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user]:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _drop(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.current_bytes -= entry[3]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+results = ResultCache()
+
+# === Conditional responses ===
+# `validators` gives the ETag / Last-Modified headers for a request and
+# whether the client's copy is still current (answer 304).
+def validators(request: Request, base: str, user: str):
+    version = current_version(base, user)
+    etag = etag_for(request, user, version)
+    modified = int(version) / 1e9
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept, Authorization",
+    }
+    return etag, headers, not_modified(request, etag, modified)
+
+# Answers from the client's cache (304) or the result cache when possible;
+# otherwise awaits `build()` for a Response with a body and caches it if it
+# is a 200.
+async def cached_response(request: Request, base: str, user: str, build) -> Response:
+    etag, headers, fresh = validators(request, base, user)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    hit = results.get(user, etag)
+    if hit is not None:
+        body, media_type, cached_headers, _ = hit
+        return Response(body, media_type=media_type, headers={**cached_headers, **headers})
+
+    response = await build()
+    if response.status_code == 200:
+        replaced = {"content-length", "content-type", *(name.lower() for name in headers)}
+        extra = {name: value for name, value in response.headers.items() if name not in replaced}
+        results.put(user, etag, response.body, response.media_type, extra)
+    response.headers.update(headers)
+    return response
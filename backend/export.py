@@ -0,0 +1,167 @@
+# backend/export.py
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+
+# === Config ===
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 10_000))
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# === Cached export files ===
+# Generated exports are kept next to the merged data and reused while the
+# user's dataset version (etags.current_version) is unchanged. Each export's
+# file is keyed by a digest of the request parameters, which include that
+# version, so an export still being written when /merge, /reset or an edit
+# clears the old files can never answer a request for the newer data.
+def export_key(**params) -> str:
+    params = {name: value for name, value in params.items() if value not in ("", None)}
+    if not params:
+        return ""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def export_path(base: str, user: str, fmt: str, key: str = "") -> str:
+    suffix = f"_{key}" if key else ""
+    return os.path.join(base, f"{user}_export{suffix}.{fmt}")
+
+def clear_exports(base: str, user: str) -> None:
+    for path in glob.glob(os.path.join(base, f"{user}_export*")):
+        if not path.endswith(".tmp"):
+            os.remove(path)
+
+def is_fresh(path: str, source: str = None) -> bool:
+    if not os.path.exists(path):
+        return False
+    return source is None or os.path.getmtime(path) >= os.path.getmtime(source)
+
+# === Chunked writers ===
+# Each writer receives the dataset one DataFrame chunk at a time, so only a
+# single chunk is ever held in memory. XLSX output uses openpyxl's write-only
+# mode, which streams rows to disk instead of building the sheet in memory.
+# Parquet output is written with `schema`; without one it is inferred from the
+# first chunk, which only works when every chunk has the same column types
+# (a column that is all null in the first chunk would be typed null).
+class ExportWriter:
+    def __init__(self, path: str, fmt: str, schema: pa.Schema = None):
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self.rows = 0
+        self._columns = None
+        self._handle = None
+        self._schema = schema
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._columns is None:
+            self._open(df)
+        if self.fmt == "xlsx":
+            values = df.astype(object).where(df.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                self._handle.append(row)
+        elif self.fmt == "csv":
+            df.to_csv(self._handle, header=False, index=False)
+        else:
+            self._handle.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self.rows += len(df)
+
+    def _open(self, df: pd.DataFrame) -> None:
+        self._columns = list(df.columns)
+        if self.fmt == "xlsx":
+            self._workbook = Workbook(write_only=True)
+            self._handle = self._workbook.create_sheet()
+            self._handle.append(self._columns)
+        elif self.fmt == "csv":
+            self._handle = open(self.tmp_path, "w", newline="")
+            df.iloc[:0].to_csv(self._handle, index=False)
+        else:
+            if self._schema is None:
+                self._schema = pa.Schema.from_pandas(df, preserve_index=False)
+            self._handle = pq.ParquetWriter(self.tmp_path, self._schema)
+
+    def close(self, columns: list = None) -> str:
+        if self._columns is None:
+            self._open(pd.DataFrame(columns=columns or []))
+        if self.fmt == "xlsx":
+            self._workbook.save(self.tmp_path)
+        else:
+            self._handle.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+# === Apply offset / limit across a stream of chunks ===
+def paginate(chunks, offset: int = 0, limit: int = None):
+    for chunk in chunks:
+        if offset:
+            skipped = min(offset, len(chunk))
+            chunk = chunk.iloc[skipped:]
+            offset -= skipped
+        if limit is not None:
+            chunk = chunk.iloc[:limit]
+            limit -= len(chunk)
+        if len(chunk):
+            yield chunk
+        if limit == 0:
+            break
+
+# === Export a Parquet file chunk by chunk ===
+# `filters` are pushed down into the Parquet scan so only matching row groups
+# are decoded; `row_filter` is then applied to each decoded chunk for
+# predicates that cannot be expressed against the raw column values.
+def export_parquet(source: str, path: str, fmt: str, filters: list = None, row_filter=None,
+                   offset: int = 0, limit: int = None) -> str:
+    if fmt == "parquet" and not (filters or row_filter or offset or limit is not None):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    dataset = ds.dataset(source, format="parquet")
+    expression = pq.filters_to_expression(filters) if filters else None
+    chunks = (batch.to_pandas() for batch in dataset.to_batches(filter=expression, batch_size=EXPORT_CHUNK_ROWS))
+    if row_filter is not None:
+        chunks = (row_filter(chunk) for chunk in chunks)
+
+    writer = ExportWriter(path, fmt, schema=dataset.schema.remove_metadata())
+    for chunk in paginate(chunks, offset, limit):
+        writer.write(chunk)
+    return writer.close(columns=dataset.schema.names)
+
+def export_frame(df: pd.DataFrame, path: str, fmt: str) -> str:
+    writer = ExportWriter(path, fmt, schema=pa.Schema.from_pandas(df, preserve_index=False))
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        writer.write(df.iloc[start:start + EXPORT_CHUNK_ROWS])
+    return writer.close(columns=list(df.columns))
+
+# === Stream a finished export from disk ===
+def iter_file(path: str, chunk_size: int = STREAM_CHUNK_BYTES):
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+def streaming_response(path: str, filename: str, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_file(path),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(os.path.getsize(path)),
+        },
+    )
@@ -0,0 +1,113 @@
+# backend/fragments.py
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bump whenever parsing produces different columns or dtypes, so fragments
+# written by an older version are rebuilt instead of reused.
+FRAGMENT_VERSION = 2
+
+# === Paths ===
+def manifest_path(merged_base: str, user: str) -> str:
+    return os.path.join(merged_base, f"{user}_manifest.json")
+
+def fragment_dir(merged_base: str, user: str) -> str:
+    return os.path.join(merged_base, f"{user}_fragments")
+
+def fragment_path(frag_dir: str, sha256: str) -> str:
+    return os.path.join(frag_dir, f"{sha256}.v{FRAGMENT_VERSION}.parquet")
+
+# === Manifest I/O ===
+# The manifest maps each uploaded file name to the size, mtime and content
+# hash it had when it was last parsed. The parsed rows live in a Parquet
+# fragment named after the content hash, so renamed or re-uploaded copies of
+# the same workbook share one fragment.
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(path: str, manifest: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# === Change detection ===
+# Returns (manifest, pending). `manifest` holds the entries that can be reused
+# as-is; `pending` lists (name, entry) pairs whose fragment must be (re)built.
+# Size and mtime are checked first so unchanged files are never re-hashed.
+def plan_fragments(user_dir: str, files: list, manifest: dict, frag_dir: str):
+    fresh = {}
+    pending = []
+    for name in sorted(files):
+        path = os.path.join(user_dir, name)
+        stat = os.stat(path)
+        old = manifest.get(name)
+
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime_ns \
+                and os.path.exists(fragment_path(frag_dir, old["sha256"])):
+            fresh[name] = old
+            continue
+
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": file_sha256(path)}
+        if os.path.exists(fragment_path(frag_dir, entry["sha256"])):
+            fresh[name] = entry
+        else:
+            pending.append((name, entry))
+    return fresh, pending
+
+def write_fragment(frag_dir: str, sha256: str, df: pd.DataFrame) -> None:
+    os.makedirs(frag_dir, exist_ok=True)
+    path = fragment_path(frag_dir, sha256)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+# === Stable row ids ===
+# A row's id is made of a 28-bit hash of its file's name and content (high
+# bits) and its position in the file (low 24 bits). It stays the same across
+# merges for as long as that file is unchanged, so edits keyed by id can be
+# replayed onto a rebuilt dataset, and it fits in the 53 bits a JavaScript
+# number holds exactly. Files of more than 2**24 rows would overlap the next
+# hash value.
+ROW_POSITION_BITS = 24
+
+def row_ids(name: str, sha256: str, rows: int) -> np.ndarray:
+    prefix = int(hashlib.sha256(f"{name}\0{sha256}".encode()).hexdigest()[:7], 16)
+    return (prefix << ROW_POSITION_BITS) + np.arange(rows, dtype=np.int64)
+
+def read_fragments(frag_dir: str, manifest: dict) -> pd.DataFrame:
+    dfs = []
+    for name in sorted(manifest):
+        # An id column in the upload itself (e.g. a re-uploaded export) is replaced.
+        df = pd.read_parquet(fragment_path(frag_dir, manifest[name]["sha256"])).drop(columns=storage.ROW_ID, errors="ignore")
+        df.insert(0, storage.ROW_ID, row_ids(name, manifest[name]["sha256"], len(df)))
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True)
+
+def prune_fragments(frag_dir: str, manifest: dict) -> None:
+    if not os.path.isdir(frag_dir):
+        return
+    live = {os.path.basename(fragment_path(frag_dir, entry["sha256"])) for entry in manifest.values()}
+    for name in os.listdir(frag_dir):
+        if name not in live:
+            os.remove(os.path.join(frag_dir, name))
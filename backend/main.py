@@ -1,18 +1,33 @@
 # backend/main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, Request, Response, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import SessionLocal
 from models import SaleRecord, Base
-import pandas as pd
+import pyarrow.parquet as pq
 import os
 import shutil
 from typing import List
+import duckdb_engine
+import edits
+import etags
+import export
+import fragments
+import jobs
+import metrics
+import parsing
+import readers
+import responses
+import storage
+import summary
+from cache import datasets
+from schemas import EditedData
+from utils import tokens
 
 # Configurations
 SECRET_KEY = "your_secret_key_here"
@@ -20,6 +35,7 @@ ALGORITHM = "HS256"
 
 UPLOAD_BASE = "uploaded_files"
 MERGED_BASE = "merged_files"
+PREVIEW_MAX_ROWS = 1000
 
 os.makedirs(UPLOAD_BASE, exist_ok=True)
 os.makedirs(MERGED_BASE, exist_ok=True)
@@ -34,10 +50,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+@app.on_event("shutdown")
+def shutdown_parse_pool():
+    parsing.shutdown_pool()
+    duckdb_engine.pool.close()
+
 # Fake user store (replace with real DB in production)
 fake_users = {}
 
@@ -47,7 +69,7 @@ def create_access_token(data: dict):
 
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = tokens.decode(token, SECRET_KEY, ALGORITHM)
         return payload.get("sub")
     except JWTError:
         return None
@@ -58,6 +80,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=401, detail="Invalid token")
     return username
 
+# Request timing, GET /metrics and ?profile=1 for the users in PROFILE_USERS.
+metrics.instrument(app, verify_token)
+
 # ========== AUTH APIs ==========
 
 @app.post("/register")
@@ -90,46 +115,163 @@ async def upload_files(user: str = Depends(get_current_user), files: List[Upload
 
 # ========== MERGE Excel Files ==========
 
-@app.get("/merge")
-async def merge_files(user: str = Depends(get_current_user)):
+# /merge only validates the request and queues a background job; the job's
+# progress is read from /merge/{job_id}. A merge requested while the user's
+# previous one is still queued or running returns that job instead.
+async def run_merge(job: jobs.Job, user: str, user_dir: str, files: List[str]) -> dict:
+    # Only files that are new or changed since the last merge are re-parsed;
+    # everything else is rebuilt from its cached Parquet fragment.
+    manifest_file = fragments.manifest_path(MERGED_BASE, user)
+    frag_dir = fragments.fragment_dir(MERGED_BASE, user)
+    with metrics.span("merge.plan"):
+        manifest, pending = await run_in_threadpool(
+            fragments.plan_fragments, user_dir, files, fragments.load_manifest(manifest_file), frag_dir
+        )
+    job.files_total = len(pending)
+
+    entries = dict(pending)
+    async for path, df in parsing.iter_parsed([os.path.join(user_dir, name) for name, _ in pending]):
+        name = os.path.basename(path)
+        with metrics.span("merge.write_fragment"):
+            await run_in_threadpool(fragments.write_fragment, frag_dir, entries[name]["sha256"], df)
+        manifest[name] = entries[name]
+        job.files_done += 1
+        job.rows += len(df)
+
+    merged_bytes = await run_in_threadpool(write_outputs, user, frag_dir, manifest)
+    fragments.save_manifest(manifest_file, manifest)
+    fragments.prune_fragments(frag_dir, manifest)
+    datasets.invalidate(f"{user}/summary")
+    export.clear_exports(MERGED_BASE, user)
+    etags.bump_version(MERGED_BASE, user)
+    return {"parsed": len(pending), "reused": len(manifest) - len(pending), "merged_bytes": merged_bytes}
+
+# Edits saved through /save-edits are replayed onto the rebuilt rows.
+def write_outputs(user: str, frag_dir: str, manifest: dict) -> int:
+    with edits.lock(user):
+        with metrics.span("merge.concat"):
+            combined = fragments.read_fragments(frag_dir, manifest)
+            combined = edits.replay(MERGED_BASE, user, combined)
+        output_path = os.path.join(MERGED_BASE, f"{user}_merged.parquet")
+        with metrics.span("merge.write_parquet"):
+            merged_bytes = storage.write_merged(combined, output_path)
+        metrics.count_rows("merge", len(combined))
+        metrics.count_bytes("merge", "written", merged_bytes)
+        cube_file = summary.cube_path(MERGED_BASE, user)
+        if summary.can_build_cube(combined):
+            with metrics.span("merge.write_cube"):
+                summary.write_cube(combined, cube_file)
+        elif os.path.exists(cube_file):
+            os.remove(cube_file)
+        edits.mark_applied(MERGED_BASE, user, combined[storage.ROW_ID])
+    return merged_bytes
+
+@app.get("/merge", status_code=202)
+async def merge_files(background_tasks: BackgroundTasks, user: str = Depends(get_current_user)):
     user_dir = os.path.join(UPLOAD_BASE, user)
-    files = [f for f in os.listdir(user_dir) if f.endswith(('.xls', '.xlsx'))]
+    files = [f for f in os.listdir(user_dir) if f.lower().endswith(readers.SUPPORTED_EXTENSIONS)] if os.path.isdir(user_dir) else []
 
     if not files:
-        raise HTTPException(status_code=404, detail="No uploaded Excel files found.")
-
-    dfs = []
-    for f in files:
-        df = pd.read_excel(os.path.join(user_dir, f))
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df['Month'] = df['Date'].dt.strftime('%B')
-            df['Year'] = df['Date'].dt.year
-            df['Financial Year'] = df['Date'].apply(lambda d: f"{d.year-1}-{d.year}" if d.month <= 3 else f"{d.year}-{d.year+1}")
-        if {'Sale Value', 'Tax Value'}.issubset(df.columns):
-            df['Invoice Value'] = df['Sale Value'] + df['Tax Value']
-        dfs.append(df)
-
-    combined = pd.concat(dfs, ignore_index=True)
-    output_path = os.path.join(MERGED_BASE, f"{user}_merged.parquet")
-    combined.to_parquet(output_path, index=False)
-    return {"message": "Merged and saved."}
+        raise HTTPException(status_code=404, detail="No uploaded Excel, CSV or Parquet files found.")
+
+    job, created = jobs.merge_jobs.submit(user)
+    if created:
+        background_tasks.add_task(jobs.merge_jobs.run, job, lambda job: run_merge(job, user, user_dir, files))
+    return {"message": "Merge queued." if created else "Merge already in progress.", **job.to_dict()}
+
+@app.get("/merge/{job_id}")
+async def merge_status(job_id: str, user: str = Depends(get_current_user)):
+    job = jobs.merge_jobs.get(job_id)
+    if job is None or job.user != user:
+        raise HTTPException(status_code=404, detail="Merge job not found.")
+    return job.to_dict()
 
 # ========== PREVIEW Data ==========
 
+# `cursor` is the row offset returned in the X-Next-Cursor header of the
+# previous page; `columns` is a comma-separated list of columns to return.
 @app.get("/preview")
-async def preview_data(user: str = Depends(get_current_user)):
+async def preview_data(
+    request: Request,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=PREVIEW_MAX_ROWS),
+    columns: str = "",
+    user: str = Depends(get_current_user)
+):
     path = os.path.join(MERGED_BASE, f"{user}_merged.parquet")
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="No merged data found.")
 
-    df = pd.read_parquet(path)
-    return df.head(100).to_dict(orient="records")
+    selected = None
+    if columns:
+        selected = [col.strip() for col in columns.split(",") if col.strip()]
+        unknown = set(selected) - set(pq.read_schema(path).names)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(sorted(unknown))}")
+
+    # Edits not yet compacted into the merged file are applied to the page;
+    # they may touch columns derived from ones outside `selected`.
+    async def build():
+        with metrics.span("preview.read"):
+            changes = edits.pending(MERGED_BASE, user)
+            df, total_rows = storage.read_rows(path, cursor, limit, None if changes else selected)
+            if changes:
+                df = edits.overlay(df, changes)
+                df = df[selected] if selected else df
+        metrics.count_rows("preview", len(df))
+        headers = {}
+        if cursor + len(df) < total_rows:
+            headers["X-Next-Cursor"] = str(cursor + len(df))
+        with metrics.span("preview.serialize"):
+            return responses.frame_response(df, request, headers)
+
+    return await etags.cached_response(request, MERGED_BASE, user, build)
 
 # ========== SUMMARY Data ==========
 
+# Folds the user's pending edits into the merged file, for the readers that
+# scan it directly rather than through the cube or edits.overlay.
+def compact_edits(user: str, path: str) -> None:
+    if not edits.has_pending(MERGED_BASE, user):
+        return
+    with metrics.span("edits.compact"):
+        folded = edits.compact(MERGED_BASE, user, path)
+    if folded:
+        metrics.count_rows("edits.compact", folded)
+        export.clear_exports(MERGED_BASE, user)
+        etags.bump_version(MERGED_BASE, user)
+
+def load_summary(user: str, path: str, month: str, financial_year: str, product: str, tax_rate: float):
+    if tax_rate is not None:
+        try:
+            tax_rate = float(tax_rate)
+        except ValueError:
+            tax_rate = None
+
+    # With SUMMARY_ENGINE=duckdb the query runs as SQL over the merged file.
+    # Otherwise filters are answered from the pre-aggregated cube written by
+    # /merge; datasets merged before the cube existed fall back to reading
+    # only the summary columns and the matching row groups of the merged file.
+    if duckdb_engine.enabled():
+        compact_edits(user, path)
+        with metrics.span("summary.duckdb"):
+            return duckdb_engine.summarize(path, month, financial_year, product, tax_rate)
+
+    cube_file = summary.cube_path(MERGED_BASE, user)
+    with metrics.span("summary.load"):
+        if os.path.exists(cube_file):
+            cube = datasets.get(f"{user}/summary", cube_file)
+        else:
+            compact_edits(user, path)
+            df = storage.read_merged(path, columns=summary.SOURCE_COLUMNS, filters=storage.dataset_filters(month, financial_year))
+            cube = summary.build_cube(df)
+
+    with metrics.span("summary.aggregate"):
+        return summary.summarize(cube, month, financial_year, product, tax_rate)
+
 @app.get("/summary")
 async def filtered_summary(
+    request: Request,
     month: str = "",
     financial_year: str = "",
     product: str = "",
@@ -140,64 +282,130 @@ async def filtered_summary(
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="No merged data found.")
 
-    df = pd.read_parquet(path)
-    df.columns = [col.strip() for col in df.columns]
+    async def build():
+        result = await run_in_threadpool(load_summary, user, path, month, financial_year, product, tax_rate)
+        with metrics.span("summary.serialize"):
+            return responses.frame_response(result, request)
 
-    if month:
-        df = df[df["Month"].str.lower().str.strip() == month.lower().strip()]
-    if financial_year:
-        df = df[df["Financial Year"].astype(str).str.strip() == financial_year.strip()]
-    if product:
-        df["Product"] = df["Product"].astype(str).str.strip()
-        df = df[df["Product"].str.lower() == product.lower().strip()]
-    if tax_rate is not None:
-        try:
-            tax_rate = float(tax_rate)
-            df = df[df["Tax Rate"] == tax_rate]
-        except ValueError:
-            pass
-
-    if df.empty:
-        return []
-
-    summary = (
-        df.groupby(["Month", "Financial Year", "Product"])
-        .agg({
-            "Qty": "sum",
-            "Sale Value": "sum",
-            "Tax Value": "sum",
-            "Invoice Value": "sum",
-            "Tax Rate": "mean"
-        })
-        .reset_index()
-        .round(2)
-    )
-
-    return summary.to_dict(orient="records")
+    return await etags.cached_response(request, MERGED_BASE, user, build)
 
 # ========== DOWNLOAD Excel ==========
 
 @app.get("/download")
-async def download_excel(user: str = Depends(get_current_user)):
+async def download_excel(
+    request: Request,
+    month: str = "",
+    financial_year: str = "",
+    product: str = "",
+    tax_rate: float = None,
+    view: str = "rows",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1),
+    fmt: str = Query("xlsx", alias="format"),
+    user: str = Depends(get_current_user)
+):
     path = os.path.join(MERGED_BASE, f"{user}_merged.parquet")
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="No merged file found.")
-
-    df = pd.read_parquet(path)
-    output_excel = os.path.join(MERGED_BASE, f"{user}_filtered.xlsx")
-    df.to_excel(output_excel, index=False)
-    return FileResponse(output_excel, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", filename=f"{user}_filtered.xlsx")
+    if fmt not in export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format.")
+    if view not in ("rows", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'rows' or 'summary'.")
+    _, validators, fresh = etags.validators(request, MERGED_BASE, user)
+    if fresh:
+        return Response(status_code=304, headers=validators)
+
+    # The export is written chunk by chunk off the event loop and reused
+    # until the dataset version changes. Month, financial year and tax rate
+    # are pushed down into the Parquet scan; the product match is applied
+    # per chunk. Row exports read the merged file directly, so pending edits
+    # are folded in first (which bumps the version).
+    if view == "rows":
+        await run_in_threadpool(compact_edits, user, path)
+    key = export.export_key(version=etags.current_version(MERGED_BASE, user), month=month,
+                            financial_year=financial_year, product=product, tax_rate=tax_rate,
+                            view=None if view == "rows" else view, offset=offset or None, limit=limit)
+    output_file = export.export_path(MERGED_BASE, user, fmt, key)
+    if not export.is_fresh(output_file, path):
+        with metrics.span("download.export"):
+            if view == "summary":
+                result = await run_in_threadpool(load_summary, user, path, month, financial_year, product, tax_rate)
+                result = result.iloc[offset:offset + limit if limit else None]
+                await run_in_threadpool(export.export_frame, result, output_file, fmt)
+            else:
+                row_filter = None
+                if month or financial_year or product:
+                    row_filter = lambda df: summary.filter_rows(df, month, financial_year, product)
+                await run_in_threadpool(
+                    export.export_parquet, path, output_file, fmt,
+                    storage.dataset_filters(month, financial_year, tax_rate), row_filter, offset, limit,
+                )
+        metrics.count_bytes("download", "written", os.path.getsize(output_file))
+    metrics.count_bytes("download", "sent", os.path.getsize(output_file))
+    response = export.streaming_response(output_file, f"{user}_filtered.{fmt}", fmt)
+    response.headers.update(validators)
+    return response
+
+# ========== SAVE Edits ==========
+
+# Row-level edits keyed by the id column of /preview. They go to the user's
+# edit log and the summary cube is updated in place (see edits.save); once
+# EDITS_COMPACT_ROWS rows are pending, a background task folds them into the
+# merged file. The response lists any ids that were not found.
+@app.post("/save-edits")
+async def save_edits(data: EditedData, background_tasks: BackgroundTasks, user: str = Depends(get_current_user)):
+    path = os.path.join(MERGED_BASE, f"{user}_merged.parquet")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No merged data found.")
+    if jobs.merge_jobs.active(user):
+        raise HTTPException(status_code=409, detail="A merge is in progress, try again once it finishes.")
+    if storage.ROW_ID not in pq.read_schema(path).names:
+        raise HTTPException(status_code=409, detail="Merged data has no row ids; merge again before editing.")
+
+    with metrics.span("edits.apply"):
+        result = await run_in_threadpool(edits.save, MERGED_BASE, user, path, data.rows)
+    metrics.count_rows("edits", result["updated"])
+    if result["updated"]:
+        datasets.invalidate(f"{user}/summary")
+        export.clear_exports(MERGED_BASE, user)
+        etags.bump_version(MERGED_BASE, user)
+        if result["pending"] >= edits.EDITS_COMPACT_ROWS:
+            background_tasks.add_task(compact_edits, user, path)
+    return {"message": f"{result['updated']} row(s) updated.", **result}
+
+# ========== CACHE Stats ==========
+
+@app.get("/cache/stats")
+async def cache_stats(user: str = Depends(get_current_user)):
+    return {**datasets.stats(), "results": etags.results.stats(), "tokens": tokens.stats()}
 
 # ========== RESET Uploads ==========
 
 @app.delete("/reset")
 async def reset_all(user: str = Depends(get_current_user)):
+    if jobs.merge_jobs.active(user):
+        raise HTTPException(status_code=409, detail="A merge is in progress, try again once it finishes.")
     user_dir = os.path.join(UPLOAD_BASE, user)
     merged_file = os.path.join(MERGED_BASE, f"{user}_merged.parquet")
+    cube_file = summary.cube_path(MERGED_BASE, user)
+    manifest_file = fragments.manifest_path(MERGED_BASE, user)
+    frag_dir = fragments.fragment_dir(MERGED_BASE, user)
 
     if os.path.exists(user_dir):
         shutil.rmtree(user_dir)
     if os.path.exists(merged_file):
         os.remove(merged_file)
+    if os.path.exists(cube_file):
+        os.remove(cube_file)
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
+    if os.path.exists(frag_dir):
+        shutil.rmtree(frag_dir)
+    for edits_file in edits.paths(MERGED_BASE, user):
+        if os.path.exists(edits_file):
+            os.remove(edits_file)
+    datasets.invalidate(f"{user}/summary")
+    export.clear_exports(MERGED_BASE, user)
+    etags.bump_version(MERGED_BASE, user)
 
     return {"message": "Reset completed successfully."}
@@ -0,0 +1,133 @@
+# backend/metrics.py
+
+import cProfile
+import importlib.util
+import io
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+# === Config ===
+# Users allowed to add ?profile=1 to a request and get a profiler report back
+# instead of the response. Empty (the default) disables profiling.
+PROFILE_USERS = {name.strip() for name in os.getenv("PROFILE_USERS", "").split(",") if name.strip()}
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", 40))
+HAS_PYINSTRUMENT = importlib.util.find_spec("pyinstrument") is not None
+
+# === Metrics ===
+# Request latency runs to the start of the response and is labelled with the
+# route template (/merge/{job_id}), not the raw path, so the number of series
+# stays bounded. With several worker processes, set PROMETHEUS_MULTIPROC_DIR
+# and /metrics aggregates them.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds", "Time spent in one stage of merge, summary or download", ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+ROWS = Counter("pipeline_rows_total", "Rows processed per stage", ["stage"])
+BYTES = Counter("pipeline_bytes_total", "Bytes read or written per stage", ["stage", "direction"])
+
+def observe(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+def count_rows(stage: str, rows: int) -> None:
+    ROWS.labels(stage).inc(rows)
+
+def count_bytes(stage: str, direction: str, size: int) -> None:
+    BYTES.labels(stage, direction).inc(size)
+
+# Times the enclosed block as `stage`; works around awaits as well.
+@contextmanager
+def span(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+# Stage timings measured inside a worker process travel back with the frame
+# in df.attrs["stage_seconds"]; they are recorded here and removed from the frame.
+def record_frame_stages(df) -> None:
+    for stage, seconds in df.attrs.pop("stage_seconds", {}).items():
+        observe(stage, seconds)
+
+def render() -> Response:
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+# === Per-request profiling ===
+# pyinstrument follows the request across awaits when it is installed. The
+# cProfile fallback records everything on the event loop thread while the
+# request runs, so other requests in flight show up in its report too, and
+# work handed to the threadpool does not.
+async def profile_request(request: Request, call_next) -> Response:
+    async def run():
+        response = await call_next(request)
+        async for _ in response.body_iterator:
+            pass
+        return response
+
+    if HAS_PYINSTRUMENT:
+        from pyinstrument import Profiler
+
+        profiler = Profiler(async_mode="enabled")
+        with profiler:
+            response = await run()
+        report = profiler.output_text(unicode=True)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await run()
+        finally:
+            profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        report = out.getvalue()
+    return PlainTextResponse(report, headers={"X-Profiled-Status": str(response.status_code)})
+
+def _bearer_token(request: Request) -> str:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return token if scheme.lower() == "bearer" else ""
+
+# === Wiring ===
+# Adds the timing middleware and GET /metrics to `app`. `token_user(token)`
+# returns the username for a bearer token, or None; it decides who may use
+# ?profile=1.
+def instrument(app, token_user) -> None:
+    @app.middleware("http")
+    async def time_requests(request: Request, call_next):
+        if request.query_params.get("profile") == "1" and PROFILE_USERS:
+            token = _bearer_token(request)
+            if token and token_user(token) in PROFILE_USERS:
+                return await profile_request(request, call_next)
+
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            REQUEST_SECONDS.labels(
+                request.method, getattr(route, "path", "unmatched"), str(status),
+            ).observe(time.perf_counter() - started)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return render()
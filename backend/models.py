@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, Index, UniqueConstraint
 from database import Base
 
 class SaleRecord(Base):
@@ -23,6 +23,35 @@ class SaleRecord(Base):
     month = Column(String)
     year = Column(Integer)
 
+    # Every query is scoped to one user; /summary then narrows by financial
+    # year, month and product, and /preview pages through a user's rows by id.
+    __table_args__ = (
+        Index("ix_sale_records_user_fy_month_product", "user", "financial_year", "month", "product"),
+        Index("ix_sale_records_user_id", "user", "id"),
+    )
+
+# Rollup of sale_records at the /summary grain, kept up to date by /merge.
+# row_count is the number of raw rows behind each cell, used to rebuild the
+# average tax rate.
+class SaleSummary(Base):
+    __tablename__ = "sale_summary"
+
+    id = Column(Integer, primary_key=True)
+    user = Column(String, nullable=False)
+    financial_year = Column(String)
+    month = Column(String)
+    product = Column(String)
+    tax_rate = Column(Float)
+    qty = Column(Float)
+    sale_value = Column(Float)
+    tax_value = Column(Float)
+    total_value = Column(Float)
+    row_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user", "financial_year", "month", "product", "tax_rate", name="uq_sale_summary_grain"),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
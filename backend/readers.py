@@ -0,0 +1,91 @@
+# backend/readers.py
+
+import importlib.util
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# === Columns read from uploaded files ===
+# Only these columns are read; anything else in an upload is ignored. Month,
+# Year, Quarter and Invoice Value are derived after reading, and Financial
+# Year is recomputed whenever a Date column is present.
+TEXT_COLUMNS = [
+    "Customer Code", "Customer Name", "Customer Place", "Location of Supply",
+    "Product", "Unit of Qty", "Financial Year",
+]
+NUMBER_COLUMNS = ["Tax Rate", "Qty", "Sale Value", "Tax Value", "Total Value"]
+DATE_COLUMNS = ["Date"]
+SOURCE_COLUMNS = set(TEXT_COLUMNS + NUMBER_COLUMNS + DATE_COLUMNS)
+
+# === Engine selection ===
+# calamine (Rust) reads both .xlsx and .xls and is several times faster than
+# openpyxl; it is used whenever python-calamine is installed. Without it,
+# .xlsx falls back to openpyxl and .xls to xlrd.
+HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+HAS_XLRD = importlib.util.find_spec("xlrd") is not None
+
+def excel_engine(ext: str) -> str:
+    if HAS_CALAMINE:
+        return "calamine"
+    if ext == ".xls":
+        if not HAS_XLRD:
+            raise ValueError(".xls files need python-calamine or xlrd installed")
+        return "xlrd"
+    return "openpyxl"
+
+def _wanted(name) -> bool:
+    return str(name).strip() in SOURCE_COLUMNS
+
+# === Readers, one per file format ===
+def read_excel(path: str, engine: str = None) -> pd.DataFrame:
+    engine = engine or excel_engine(os.path.splitext(path)[1].lower())
+    return pd.read_excel(path, engine=engine, usecols=_wanted)
+
+def read_csv(path: str) -> pd.DataFrame:
+    with pacsv.open_csv(path) as reader:
+        names = [name for name in reader.schema.names if _wanted(name)]
+    types = {name: pa.string() for name in names if name.strip() in TEXT_COLUMNS}
+    types.update({name: pa.float64() for name in names if name.strip() in NUMBER_COLUMNS})
+    options = pacsv.ConvertOptions(include_columns=names, column_types=types)
+    return pacsv.read_csv(path, convert_options=options).to_pandas()
+
+def read_parquet(path: str) -> pd.DataFrame:
+    names = [name for name in pq.read_schema(path).names if _wanted(name)]
+    return pq.read_table(path, columns=names).to_pandas()
+
+READERS = {
+    ".xlsx": read_excel,
+    ".xls": read_excel,
+    ".csv": read_csv,
+    ".parquet": read_parquet,
+}
+SUPPORTED_EXTENSIONS = tuple(READERS)
+
+# === Explicit dtypes ===
+# Text columns become Python strings (None for missing); whole-number cells
+# such as customer codes are written without a trailing ".0". Number columns
+# become float64, with unparseable values treated as missing.
+def _as_text(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        series = series.astype("Int64")
+    return series.astype(str).where(series.notna(), None)
+
+def apply_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = _as_text(df[col])
+    for col in NUMBER_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+def read_file(path: str) -> pd.DataFrame:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unsupported file type: {ext}")
+    df = READERS[ext](path)
+    df.columns = [str(col).strip() for col in df.columns]
+    return apply_dtypes(df)
@@ -0,0 +1,53 @@
+# backend/responses.py
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi import Request
+from fastapi.responses import Response
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# === JSON records straight from a DataFrame ===
+# Values are taken column by column and serialized by orjson in one pass,
+# instead of df.to_dict() followed by FastAPI's jsonable_encoder. The output
+# keeps the same list-of-records shape. NaN, NaT and pd.NA become null, and
+# dates are written as ISO 8601 without a timezone.
+def _json_default(value):
+    if value is pd.NA or value is pd.NaT:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def _column_values(series: pd.Series) -> list:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = list(series.to_numpy())
+        for index in np.flatnonzero(series.isna().to_numpy()):
+            values[index] = None
+        return values
+    return series.tolist()
+
+def records_json(df: pd.DataFrame) -> bytes:
+    names = [str(name) for name in df.columns]
+    columns = [_column_values(df.iloc[:, index]) for index in range(df.shape[1])]
+    records = [dict(zip(names, row)) for row in zip(*columns)]
+    return orjson.dumps(records, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+# === Arrow IPC stream ===
+def arrow_stream(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def wants_arrow(request: Request) -> bool:
+    return ARROW_STREAM in request.headers.get("accept", "")
+
+# Serializes a result frame as JSON records, or as an Arrow IPC stream when
+# the client sends `Accept: application/vnd.apache.arrow.stream`.
+def frame_response(df: pd.DataFrame, request: Request, headers: dict = None) -> Response:
+    headers = {**(headers or {}), "Vary": "Accept"}
+    if wants_arrow(request):
+        return Response(arrow_stream(df), media_type=ARROW_STREAM, headers=headers)
+    return Response(records_json(df), media_type="application/json", headers=headers)
@@ -0,0 +1,189 @@
+# backend/storage.py
+
+import calendar
+import os
+import typing
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from schemas import ExcelRow
+
+# === Config ===
+# Upper bound on rows per Parquet row group. Row groups are also cut at every
+# (Financial Year, Month) boundary, so a filter on either column only decodes
+# the row groups that can match.
+ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", 64_000))
+PARTITION_COLUMNS = ["Financial Year", "Month"]
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+MONTH_NAMES = {name.lower(): name for name in calendar.month_name[1:]}
+# Position of each month in the April-March financial year
+FISCAL_MONTHS = {calendar.month_name[(index + 3) % 12 + 1]: index for index in range(12)}
+
+# Rows are ordered by Financial Year, month within the financial year, then
+# Date. Month is a categorical with alphabetical categories, so it is sorted
+# by its position in the April-March year instead. The sort is stable, so
+# rows of the same day keep upload order.
+def _sort_chronologically(df: pd.DataFrame) -> pd.DataFrame:
+    order = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    if "Financial Year" in df.columns:
+        order["financial_year"] = df["Financial Year"].astype(object).to_numpy()
+    if "Month" in df.columns:
+        order["month"] = df["Month"].astype(object).map(FISCAL_MONTHS).to_numpy()
+    if "Date" in df.columns:
+        order["date"] = pd.to_datetime(df["Date"], errors="coerce").to_numpy()
+    if order.columns.empty:
+        return df
+    order = order.sort_values(list(order.columns), kind="stable", na_position="last")
+    return df.iloc[order.index].reset_index(drop=True)
+
+def _partition_bounds(df: pd.DataFrame, keys: list):
+    if df.empty:
+        return []
+    if not keys:
+        return [(0, len(df))]
+    codes = np.column_stack([pd.factorize(df[key])[0] for key in keys])
+    cuts = np.flatnonzero((np.diff(codes, axis=0) != 0).any(axis=1)) + 1
+    edges = [0, *cuts.tolist(), len(df)]
+    return list(zip(edges[:-1], edges[1:]))
+
+# === Canonical merged schema ===
+# Column types come from schemas.ExcelRow (underscores read as spaces) plus
+# the row id assigned at merge time (see fragments.row_ids) and the columns
+# derived at parse time. Low-cardinality text is dictionary
+# encoded, so it loads as pandas categoricals. Money, quantities and rates
+# stay float64: float32 cannot hold paise exactly above about 1.6 lakh and
+# breaks the == filters on Tax Rate, and decimal columns load as Python
+# objects in pandas.
+ROW_ID = "id"
+DICTIONARY_COLUMNS = {
+    "Customer Name", "Customer Place", "Location of Supply", "Product", "Unit of Qty",
+    "Financial Year", "Month", "Quarter",
+}
+DERIVED_TYPES = {
+    "Date": pa.timestamp("ns"),
+    "Month": pa.string(),
+    "Year": pa.int16(),
+    "Quarter": pa.string(),
+    "Invoice Value": pa.float64(),
+}
+PYTHON_TYPES = {str: pa.string(), float: pa.float64(), int: pa.int64()}
+
+def _excel_row_types() -> dict:
+    types = {}
+    for name, field in ExcelRow.model_fields.items():
+        args = [arg for arg in typing.get_args(field.annotation) if arg is not type(None)]
+        types[name.replace("_", " ")] = PYTHON_TYPES[args[0] if args else field.annotation]
+    return types
+
+def _canonical_type(name: str, value_type: pa.DataType) -> pa.DataType:
+    if name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), value_type)
+    return value_type
+
+MERGED_SCHEMA = pa.schema([
+    pa.field(name, _canonical_type(name, value_type))
+    for name, value_type in {ROW_ID: pa.int64(), **_excel_row_types(), **DERIVED_TYPES}.items()
+])
+
+def _conform_column(column: pa.ChunkedArray, target: pa.DataType) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    if pa.types.is_dictionary(target):
+        return pc.dictionary_encode(column.cast(target.value_type))
+    return column.cast(target)
+
+# Columns in MERGED_SCHEMA are cast to their canonical type; any others keep
+# the type pyarrow infers for them.
+def to_table(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for index, name in enumerate(table.column_names):
+        if name in MERGED_SCHEMA.names:
+            target = MERGED_SCHEMA.field(name).type
+            table = table.set_column(index, name, _conform_column(table.column(name), target))
+    return table
+
+# Partition columns are stored as plain strings (see write_merged); they are
+# dictionary encoded again after reading.
+def _restore_dictionaries(table: pa.Table) -> pa.Table:
+    for key in PARTITION_COLUMNS:
+        if key in table.column_names and pa.types.is_string(table.schema.field(key).type):
+            index = table.schema.get_field_index(key)
+            table = table.set_column(index, key, pc.dictionary_encode(table.column(key)))
+    return table
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    return _restore_dictionaries(table).to_pandas()
+
+# === Write the merged dataset ===
+# Rows are conformed to MERGED_SCHEMA, sorted by Financial Year, Month and
+# Date in calendar order (see _sort_chronologically) and written
+# zstd-compressed with column statistics, so readers can skip row groups
+# using `filters=`. The partition columns are stored as plain strings: pyarrow
+# does not prune row groups on dictionary-typed columns, and Parquet
+# dictionary-encodes the pages anyway. Returns the size of the written file.
+def write_merged(df: pd.DataFrame, path: str) -> int:
+    keys = [key for key in PARTITION_COLUMNS if key in df.columns]
+    if keys:
+        df = _sort_chronologically(df)
+    table = to_table(df)
+    for key in keys:
+        index = table.schema.get_field_index(key)
+        if pa.types.is_dictionary(table.schema.field(key).type):
+            table = table.set_column(index, key, table.column(key).cast(pa.string()))
+
+    tmp_path = f"{path}.tmp"
+    with pq.ParquetWriter(tmp_path, table.schema, compression=PARQUET_COMPRESSION, write_statistics=True) as writer:
+        for start, stop in _partition_bounds(df, keys) or [(0, 0)]:
+            writer.write_table(table.slice(start, stop - start), row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+# === Read with column projection and predicate pushdown ===
+def dataset_filters(month: str = "", financial_year: str = "", tax_rate: float = None):
+    filters = []
+    if financial_year:
+        filters.append(("Financial Year", "==", financial_year.strip()))
+    if month:
+        filters.append(("Month", "==", MONTH_NAMES.get(month.lower().strip(), month.strip())))
+    if tax_rate is not None:
+        filters.append(("Tax Rate", "==", tax_rate))
+    return filters or None
+
+def read_merged(path: str, columns: list = None, filters: list = None) -> pd.DataFrame:
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    return to_pandas(pq.read_table(path, columns=columns, filters=filters))
+
+# === Read a page of rows by offset ===
+# Uses the row counts in the file footer to find the row groups covering
+# [offset, offset + limit), so the cost of a page does not grow with the
+# offset. Returns the page and the total row count.
+def read_rows(path: str, offset: int, limit: int, columns: list = None):
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    groups = []
+    first_row = None
+    start = 0
+    for index in range(metadata.num_row_groups):
+        rows = metadata.row_group(index).num_rows
+        if start >= offset + limit:
+            break
+        if start + rows > offset:
+            groups.append(index)
+            if first_row is None:
+                first_row = start
+        start += rows
+
+    if not groups:
+        table = parquet_file.schema_arrow.empty_table()
+        if columns is not None:
+            table = table.select(columns)
+        return to_pandas(table), metadata.num_rows
+    table = parquet_file.read_row_groups(groups, columns=columns)
+    return to_pandas(table.slice(offset - first_row, limit)), metadata.num_rows
@@ -0,0 +1,98 @@
+# backend/summary.py
+
+import os
+
+import pandas as pd
+
+import storage
+
+GROUP_KEYS = ["Month", "Financial Year", "Product"]
+CUBE_KEYS = GROUP_KEYS + ["Tax Rate"]
+SUM_COLUMNS = ["Qty", "Sale Value", "Tax Value", "Invoice Value"]
+SOURCE_COLUMNS = CUBE_KEYS + SUM_COLUMNS
+RESULT_COLUMNS = GROUP_KEYS + SUM_COLUMNS + ["Tax Rate"]
+
+def cube_path(merged_base: str, user: str) -> str:
+    return os.path.join(merged_base, f"{user}_summary.parquet")
+
+def can_build_cube(df: pd.DataFrame) -> bool:
+    return set(SOURCE_COLUMNS).issubset(df.columns)
+
+# === Build the pre-aggregated cube ===
+# One row per (Month, Financial Year, Product, Tax Rate) with the column sums
+# and the number of rows behind it. Missing keys are kept as their own cells so
+# the raw totals are preserved; /summary drops them the same way a groupby on
+# the full dataset would. product_label is the stripped product name reported
+# when filtering by product, and the *_key columns hold the normalized values
+# the /summary filters compare against.
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[SOURCE_COLUMNS].assign(product_label=df["Product"].astype(str).str.strip())
+    grouped = df.groupby(CUBE_KEYS + ["product_label"], dropna=False, observed=True, sort=False)
+    cube = grouped[SUM_COLUMNS].sum()
+    cube["Rows"] = grouped.size()
+    return _add_filter_keys(cube.reset_index())
+
+def _add_filter_keys(cube: pd.DataFrame) -> pd.DataFrame:
+    cube["month_key"] = cube["Month"].str.lower().str.strip()
+    cube["financial_year_key"] = cube["Financial Year"].astype(str).str.strip()
+    cube["product_key"] = cube["product_label"].str.lower()
+    return cube
+
+def write_cube(df: pd.DataFrame, path: str) -> None:
+    storage.write_merged(build_cube(df), path)
+
+# === Update the cube for edited rows ===
+# `old` and `new` hold the edited rows before and after the edit. Their cells
+# are subtracted from and added to the cube, and cells left without rows are
+# dropped, so the cube matches a rebuild without reading the merged dataset.
+def update_cube(cube: pd.DataFrame, old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    removed = build_cube(old)
+    removed[SUM_COLUMNS + ["Rows"]] = -removed[SUM_COLUMNS + ["Rows"]]
+    keys = CUBE_KEYS + ["product_label"]
+    parts = [part[keys + SUM_COLUMNS + ["Rows"]].astype({key: object for key in keys}) for part in (cube, removed, build_cube(new))]
+    grouped = pd.concat(parts, ignore_index=True).groupby(keys, dropna=False, sort=False)
+    cube = grouped[SUM_COLUMNS].sum()
+    cube["Rows"] = grouped["Rows"].sum()
+    cube = cube[cube["Rows"] > 0].reset_index()
+    cube["Tax Rate"] = cube["Tax Rate"].astype(float)
+    return _add_filter_keys(cube)
+
+# === Apply the /summary filters to raw rows ===
+def filter_rows(df: pd.DataFrame, month: str = "", financial_year: str = "", product: str = "", tax_rate: float = None) -> pd.DataFrame:
+    if month:
+        df = df[df["Month"].str.lower().str.strip() == month.lower().strip()]
+    if financial_year:
+        df = df[df["Financial Year"].astype(str).str.strip() == financial_year.strip()]
+    if product:
+        df = df[df["Product"].astype(str).str.strip().str.lower() == product.lower().strip()]
+    if tax_rate is not None:
+        df = df[df["Tax Rate"] == tax_rate]
+    return df
+
+# === Answer a /summary request from the cube ===
+# Gives the same rows as grouping the filtered dataset by Month, Financial Year
+# and Product: sums are re-added and the mean Tax Rate is rebuilt from the
+# per-rate row counts. Rows are ordered by the text of the group keys, since
+# the dictionary-encoded columns would otherwise sort in first-seen order.
+def summarize(cube: pd.DataFrame, month: str = "", financial_year: str = "", product: str = "", tax_rate: float = None) -> pd.DataFrame:
+    if month:
+        cube = cube[cube["month_key"] == month.lower().strip()]
+    if financial_year:
+        cube = cube[cube["financial_year_key"] == financial_year.strip()]
+    if product:
+        matches = cube["product_key"] == product.lower().strip()
+        cube = cube[matches].assign(Product=cube.loc[matches, "product_label"])
+    if tax_rate is not None:
+        cube = cube[cube["Tax Rate"] == tax_rate]
+
+    if cube.empty:
+        return cube[RESULT_COLUMNS].reset_index(drop=True)
+
+    rated_rows = cube["Rows"].where(cube["Tax Rate"].notna(), 0)
+    cube = cube.assign(rate_total=cube["Tax Rate"].fillna(0) * rated_rows, rated_rows=rated_rows)
+
+    result = cube.groupby(GROUP_KEYS, observed=True)[SUM_COLUMNS + ["rate_total", "rated_rows"]].sum()
+    result["Tax Rate"] = result["rate_total"] / result["rated_rows"]
+    result = result.drop(columns=["rate_total", "rated_rows"]).reset_index()
+    result = result.sort_values(GROUP_KEYS, key=lambda col: col.astype(str), kind="stable", ignore_index=True)
+    return result.round(2)
@@ -0,0 +1,52 @@
+# backend/tests/test_summary_download.py
+
+import io
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+ROWS = pd.DataFrame({
+    "Customer Code": ["27ABCDE1234F1Z5", "07ABCDE1234F1Z5"],
+    "Customer Name": ["Sai Traders", "Om Traders"],
+    "Customer Place": ["Pune", "Dwarka"],
+    "Location of Supply": ["Maharashtra", "Delhi"],
+    "Date": ["2022-04-05", "2022-05-10"],
+    "Product": ["Rice", "Soap"],
+    "Tax Rate": [5.0, 18.0],
+    "Qty": [10.0, 4.0],
+    "Unit of Qty": ["kg", "nos"],
+    "Sale Value": [480.0, 180.0],
+    "Tax Value": [24.0, 32.4],
+    "Total Value": [504.0, 212.4],
+})
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import main
+
+    with TestClient(main.app) as client:
+        headers = {"Authorization": f"Bearer {main.create_access_token({'sub': 'alice'})}"}
+        upload = ROWS.to_csv(index=False).encode()
+        client.post("/upload", files=[("files", ("sales.csv", upload))], headers=headers)
+        job = client.get("/merge", headers=headers).json()
+        while job["status"] in ("queued", "running"):
+            time.sleep(0.05)
+            job = client.get(f"/merge/{job['job_id']}", headers=headers).json()
+        assert job["status"] == "done"
+        yield client, headers
+
+def test_summary_download_with_no_matching_rows_has_summary_columns(client):
+    client, headers = client
+    expected = ["Month", "Financial Year", "Product", "Qty", "Sale Value", "Tax Value", "Invoice Value", "Tax Rate"]
+
+    matched = client.get("/download", params={"view": "summary", "format": "csv"}, headers=headers)
+    assert list(pd.read_csv(io.BytesIO(matched.content)).columns) == expected
+
+    empty = client.get("/download", params={"view": "summary", "format": "csv", "product": "Cement"}, headers=headers)
+    assert empty.status_code == 200
+    result = pd.read_csv(io.BytesIO(empty.content))
+    assert result.empty
+    assert list(result.columns) == expected
@@ -48,15 +48,18 @@ const Dashboard = () => {
     }));
   };
 
-  const applyFilters = async () => {
+  const buildFilterParams = () => {
     const filterParams = {};
     if (filters["Month"]) filterParams.month = filters["Month"];
     if (filters["Financial Year"]) filterParams.financial_year = filters["Financial Year"];
     if (filters["Product"]) filterParams.product = filters["Product"];
     if (filters["Tax Rate"]) filterParams.tax_rate = filters["Tax Rate"];
+    return filterParams;
+  };
 
+  const applyFilters = async () => {
     try {
-      const filteredSummary = await fetchSummary(filterParams);
+      const filteredSummary = await fetchSummary(buildFilterParams());
       setSummaryData(filteredSummary.data);
     } catch (error) {
       console.error("Filter error:", error);
@@ -64,7 +67,7 @@ const Dashboard = () => {
   };
 
   const handleDownload = () => {
-    downloadMergedExcel()
+    downloadMergedExcel(buildFilterParams())
       .then((res) => {
         const url = window.URL.createObjectURL(new Blob([res.data]));
         const link = document.createElement("a");
@@ -63,7 +63,7 @@ export default function ExcelUploader({ onUploadSuccess }) {
       <input
         type="file"
         multiple
-        accept=".xls,.xlsx"
+        accept=".xls,.xlsx,.csv,.parquet"
         onChange={handleFileChange}
         className="block w-full mb-4 text-sm text-gray-600 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border file:border-gray-300 file:bg-white file:text-gray-700 hover:file:bg-gray-100"
       />
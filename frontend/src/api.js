@@ -35,13 +35,25 @@ export const uploadExcelFiles = (files) => {
   });
 };
 
-// 🔄 MERGE
+// 🔄 MERGE (runs in the background; wait on the returned job_id)
 export const triggerMerge = () =>
   axios.get(`${API_URL}/merge`, { headers: getAuthHeaders() });
 
-// 👁️ PREVIEW
-export const fetchPreview = () =>
-  axios.get(`${API_URL}/preview`, { headers: getAuthHeaders() });
+export const fetchMergeJob = (jobId) =>
+  axios.get(`${API_URL}/merge/${jobId}`, { headers: getAuthHeaders() });
+
+export const waitForMerge = async (jobId, intervalMs = 1000) => {
+  for (;;) {
+    const { data } = await fetchMergeJob(jobId);
+    if (data.status === "done") return data;
+    if (data.status === "failed") throw new Error(data.error || "Merge failed");
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
+// 👁️ PREVIEW (pass { cursor } from the X-Next-Cursor header to get the next page)
+export const fetchPreview = (params) =>
+  axios.get(`${API_URL}/preview`, { headers: getAuthHeaders(), params });
 
 // 📊 SUMMARY (with filters)
 export const fetchSummary = (filters) =>
@@ -51,9 +63,10 @@ export const fetchSummary = (filters) =>
   });
 
 // ⬇️ DOWNLOAD FILTERED DATA
-export const downloadMergedExcel = () =>
+export const downloadMergedExcel = (filters) =>
   axios.get(`${API_URL}/download`, {
     headers: getAuthHeaders(),
+    params: filters,
     responseType: "blob",
   });
 
@@ -0,0 +1,223 @@
+# ingest.py
+
+import logging
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import Date, Float, Integer, bindparam, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import enrich
+import metrics
+from models import SaleRecord, SaleSummary
+
+logger = logging.getLogger(__name__)
+
+# === Config ===
+# Rows sent to the database per round trip. Only one batch is converted to
+# Python objects at a time, so memory stays flat however large the sheet is.
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 5000))
+
+# Merged DataFrame column -> sale_records column
+COLUMN_MAP = {
+    "Customer Code": "customer_code",
+    "Customer Name": "customer_name",
+    "Customer Place": "customer_place",
+    "Location of Supply": "location_of_supply",
+    "Date": "date",
+    "Product": "product",
+    "Tax Rate": "tax_rate",
+    "Qty": "qty",
+    "Unit of Qty": "unit_of_qty",
+    "Sale Value": "sale_value",
+    "Tax Value": "tax_value",
+    "Invoice Value": "total_value",
+    "Financial Year": "financial_year",
+    "Month": "month",
+    "Year": "year",
+}
+
+COLUMNS = ["user"] + list(COLUMN_MAP.values())
+
+# sale_summary grain and the measures summed into it
+SUMMARY_KEYS = ["user", "financial_year", "month", "product", "tax_rate"]
+SUMMARY_MEASURES = ["qty", "sale_value", "tax_value", "total_value"]
+
+# === Convert one column of a batch into plain Python values (None for missing) ===
+def _column_values(series: pd.Series, column_type) -> list:
+    if isinstance(column_type, Date):
+        values = pd.to_datetime(series, errors="coerce")
+        return values.dt.date.astype(object).where(values.notna(), None).tolist()
+    if isinstance(column_type, Integer):
+        values = pd.to_numeric(series, errors="coerce").astype("Int64")
+        return values.astype(object).where(values.notna(), None).tolist()
+    if isinstance(column_type, Float):
+        values = pd.to_numeric(series, errors="coerce").astype(float)
+        return values.astype(object).where(values.notna(), None).tolist()
+    return series.astype(str).where(series.notna(), None).tolist()
+
+# === Arrow schema for a query's result columns ===
+# Parquet exports are written with the types of the selected columns rather
+# than types guessed from the first chunk of rows.
+ARROW_TYPES = [(Date, pa.date32()), (Integer, pa.int64()), (Float, pa.float64())]
+
+def arrow_schema(columns) -> pa.Schema:
+    fields = []
+    for column in columns:
+        arrow_type = next((arrow for sql_type, arrow in ARROW_TYPES if isinstance(column.type, sql_type)), pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+def iter_batches(df: pd.DataFrame, user: str, batch_size: int = INGEST_BATCH_SIZE):
+    table = SaleRecord.__table__
+    for start in range(0, len(df), batch_size):
+        chunk = df.iloc[start:start + batch_size]
+        columns = [[user] * len(chunk)]
+        for src, col in COLUMN_MAP.items():
+            if src in chunk.columns:
+                columns.append(_column_values(chunk[src], table.c[col].type))
+            else:
+                columns.append([None] * len(chunk))
+        yield list(zip(*columns))
+
+# === Roll a batch up to the sale_summary grain ===
+# Sums follow SQL semantics: a cell whose values are all missing stays NULL.
+def summary_deltas(batch: list) -> list:
+    df = pd.DataFrame.from_records(batch, columns=COLUMNS)[SUMMARY_KEYS + SUMMARY_MEASURES]
+    df[SUMMARY_MEASURES] = df[SUMMARY_MEASURES].astype(float)
+    grouped = df.groupby(SUMMARY_KEYS, dropna=False, sort=False)
+    deltas = grouped[SUMMARY_MEASURES].sum(min_count=1)
+    deltas["row_count"] = grouped.size()
+    deltas = deltas.reset_index()
+    return deltas.astype(object).where(deltas.notna(), None).to_dict(orient="records")
+
+def _add(column, excluded):
+    return func.coalesce(column + excluded, column, excluded)
+
+# === Add deltas to sale_summary ===
+# Upserts on the grain's unique constraint where the dialect supports it.
+# Cells with a NULL key never conflict, so they are inserted as extra rows;
+# /summary re-aggregates, so the totals are the same either way.
+async def apply_summary_deltas(session: AsyncSession, deltas: list) -> None:
+    if not deltas:
+        return
+    conn = await session.connection()
+    table = SaleSummary.__table__
+    if conn.dialect.name == "postgresql":
+        stmt = postgresql.insert(table)
+    elif conn.dialect.name == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        await session.execute(insert(table), deltas)
+        return
+
+    updates = {col: _add(table.c[col], stmt.excluded[col]) for col in SUMMARY_MEASURES}
+    updates["row_count"] = table.c.row_count + stmt.excluded.row_count
+    await session.execute(stmt.on_conflict_do_update(index_elements=SUMMARY_KEYS, set_=updates), deltas)
+
+# Deltas that move rows from their `old` to their `new` values: the old rows
+# are subtracted from their cells and the new ones added.
+def edit_deltas(old: list, new: list) -> list:
+    removed = pd.DataFrame(summary_deltas(old))
+    removed[SUMMARY_MEASURES + ["row_count"]] = -removed[SUMMARY_MEASURES + ["row_count"]].astype(float)
+    df = pd.concat([removed, pd.DataFrame(summary_deltas(new))], ignore_index=True)
+    grouped = df.groupby(SUMMARY_KEYS, dropna=False, sort=False)
+    deltas = grouped[SUMMARY_MEASURES].sum(min_count=1)
+    deltas["row_count"] = grouped["row_count"].sum().astype(int)
+    deltas = deltas.reset_index()
+    return deltas.astype(object).where(deltas.notna(), None).to_dict(orient="records")
+
+async def clear_summary(session: AsyncSession, user: str) -> None:
+    await session.execute(SaleSummary.__table__.delete().where(SaleSummary.user == user))
+
+# === Bulk insert a DataFrame into sale_records ===
+# Uses asyncpg's COPY protocol when the session is bound to asyncpg, and a
+# batched executemany INSERT on any other driver. Each batch is also rolled
+# up into sale_summary in the same transaction.
+async def bulk_insert(session: AsyncSession, df: pd.DataFrame, user: str) -> int:
+    conn = await session.connection()
+    use_copy = conn.dialect.driver == "asyncpg"
+    if use_copy:
+        raw = await conn.get_raw_connection()
+        driver_conn = raw.driver_connection
+
+    rows = 0
+    for batch in iter_batches(df, user):
+        if use_copy:
+            await driver_conn.copy_records_to_table(
+                SaleRecord.__tablename__, records=batch, columns=COLUMNS
+            )
+        else:
+            await session.execute(
+                insert(SaleRecord.__table__), [dict(zip(COLUMNS, row)) for row in batch]
+            )
+        await apply_summary_deltas(session, summary_deltas(batch))
+        rows += len(batch)
+    return rows
+
+# `frames` is an async iterable of DataFrames; `progress(rows)` is called
+# after each one is inserted.
+async def ingest_frames(session: AsyncSession, frames, user: str, progress=None) -> dict:
+    started = time.perf_counter()
+    rows = 0
+    async for df in frames:
+        with metrics.span("merge.insert"):
+            inserted = await bulk_insert(session, df, user)
+        metrics.count_rows("merge", inserted)
+        rows += inserted
+        if progress is not None:
+            progress(inserted)
+    with metrics.span("merge.commit"):
+        await session.commit()
+
+    elapsed = time.perf_counter() - started
+    rows_per_sec = round(rows / elapsed, 1) if elapsed > 0 else float(rows)
+    logger.info("Ingested %d rows for %s in %.2fs (%.1f rows/sec)", rows, user, elapsed, rows_per_sec)
+    return {"rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": rows_per_sec}
+
+# === Apply row edits to sale_records ===
+# `edits` are schemas.EditedRow objects. The current values of the edited rows
+# are read once, the changes (and the columns derived from them) applied in
+# pandas, and the rows written back with one executemany UPDATE keyed by id.
+# sale_summary is adjusted by the difference between the old and new rows
+# instead of being rebuilt. Ids that are not the user's are reported as
+# missing. The caller commits.
+async def apply_edits(session: AsyncSession, user: str, edits: list) -> dict:
+    changes = {}
+    for edit in edits:
+        values = edit.changes()
+        if "Total Value" in values:
+            values["Invoice Value"] = values.pop("Total Value")
+        changes.setdefault(edit.id, {}).update(values)
+    if not changes:
+        return {"updated": 0, "missing": []}
+
+    table = SaleRecord.__table__
+    query = select(table.c.id, *(table.c[col].label(src) for src, col in COLUMN_MAP.items())) \
+        .where(SaleRecord.user == user, SaleRecord.id.in_(list(changes)))
+    result = await session.execute(query)
+    old = pd.DataFrame(result.all(), columns=["id", *COLUMN_MAP])
+    missing = sorted(set(changes) - set(old["id"].tolist()))
+    if old.empty:
+        return {"updated": 0, "missing": missing}
+
+    new = enrich.apply_changes(old, old["id"], changes)
+    old_rows = [row for batch in iter_batches(old, user) for row in batch]
+    new_rows = [row for batch in iter_batches(new, user) for row in batch]
+
+    stmt = update(table).where(table.c.id == bindparam("row_id"), table.c.user == user) \
+        .values({col: bindparam(f"new_{col}") for col in COLUMN_MAP.values()})
+    params = [
+        {"row_id": row_id, **{f"new_{col}": value for col, value in zip(COLUMNS[1:], row[1:])}}
+        for row_id, row in zip(old["id"].tolist(), new_rows)
+    ]
+    await session.execute(stmt, params)
+
+    await apply_summary_deltas(session, edit_deltas(old_rows, new_rows))
+    await session.execute(
+        SaleSummary.__table__.delete().where(SaleSummary.user == user, SaleSummary.row_count == 0)
+    )
+    return {"updated": len(params), "missing": missing}
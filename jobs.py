@@ -0,0 +1,109 @@
+# backend/jobs.py
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# === Config ===
+# Merges run after the /merge response is sent. At most MERGE_WORKERS run at
+# once per process; later ones wait as "queued". Finished jobs stay readable
+# for JOB_RETENTION_SECONDS.
+MERGE_WORKERS = int(os.getenv("MERGE_WORKERS", 2))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", 3600))
+
+class Job:
+    def __init__(self, user: str):
+        self.id = uuid.uuid4().hex
+        self.user = user
+        self.status = "queued"
+        self.files_total = 0
+        self.files_done = 0
+        self.rows = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> dict:
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "rows": self.rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "result": self.result,
+            "error": self.error,
+        }
+
+# === In-process job registry ===
+# Jobs live in memory on the event loop thread. Each user has at most one
+# active merge: submitting while one is queued or running returns that job
+# instead of starting another, so client retries do not pile up duplicate
+# merges.
+class JobQueue:
+    def __init__(self, workers: int = MERGE_WORKERS, retention: int = JOB_RETENTION_SECONDS):
+        self.workers = workers
+        self.retention = retention
+        self._jobs = {}
+        self._active = {}
+        self._slots = None
+        self._loop = None
+
+    def submit(self, user: str):
+        """Return (job, created); created is False when an active job was reused."""
+        self._expire()
+        job = self.active(user)
+        if job:
+            return job, False
+        job = Job(user)
+        self._jobs[job.id] = job
+        self._active[user] = job.id
+        return job, True
+
+    def get(self, job_id: str) -> Job:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def active(self, user: str) -> Job:
+        job = self._jobs.get(self._active.get(user))
+        return job if job and job.active else None
+
+    async def run(self, job: Job, func) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(max(self.workers, 1))
+            self._loop = loop
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                job.result = await func(job)
+                job.status = "done"
+        except Exception as exc:
+            logger.exception("Merge job %s for %s failed", job.id, job.user)
+            job.status = "failed"
+            job.error = getattr(exc, "detail", None) or str(exc)
+        finally:
+            job.finished_at = time.time()
+            if self._active.get(job.user) == job.id:
+                del self._active[job.user]
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+merge_jobs = JobQueue()
@@ -1,30 +1,54 @@
 # backend/main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRouter
 from typing import List
 import pandas as pd
 import os
-import uuid
+from sqlalchemy import case, func
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from models import SaleRecord
-from database import SessionLocal, engine
-from utils import get_current_user
-from schemas import ExcelRow
+from models import SaleRecord, SaleSummary
+from database import SessionLocal, get_db, pool_stats
+from utils import get_current_user, tokens
+from schemas import EditedData
 from fastapi import BackgroundTasks
+import parsing
+import readers
+import ingest
+import etags
+import export
+import jobs
+import metrics
+import uploads
 
 # === Config ===
 UPLOAD_BASE = "user_uploads"
 MERGED_BASE = "user_merged"
+PREVIEW_MAX_ROWS = 1000
 os.makedirs(UPLOAD_BASE, exist_ok=True)
 os.makedirs(MERGED_BASE, exist_ok=True)
 
 app = FastAPI()
 router = APIRouter()
 
+# === Upload Size Limit ===
+# Uploads whose declared size is over the per-request cap are rejected before
+# the multipart body is read. Registered before CORS so the 413 still carries
+# the CORS headers.
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.url.path == "/upload":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > uploads.UPLOAD_MAX_REQUEST_BYTES:
+            return JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                content={"detail": "Upload is larger than the per-request limit."})
+    return await call_next(request)
+
 # === CORS ===
 app.add_middleware(
     CORSMiddleware,
@@ -32,8 +56,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# === Metrics ===
+# Request timing, GET /metrics and ?profile=1 for the users in PROFILE_USERS.
+def token_user(token: str):
+    try:
+        return get_current_user(token)
+    except HTTPException:
+        return None
+
+metrics.instrument(app, token_user)
+
+@app.on_event("shutdown")
+def shutdown_parse_pool():
+    parsing.shutdown_pool()
+
 # === Upload Files ===
 @router.post("/upload")
 async def upload_files(
@@ -43,134 +82,253 @@ async def upload_files(
     user_dir = os.path.join(UPLOAD_BASE, user)
     os.makedirs(user_dir, exist_ok=True)
 
-    for file in files:
-        file_path = os.path.join(user_dir, f"{uuid.uuid4()}_{file.filename}")
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+    # Files already stored for this user (same content) are skipped. If any
+    # file breaks a size limit, the files saved by this request are removed.
+    saved, skipped = [], []
+    budget = uploads.UPLOAD_MAX_REQUEST_BYTES
+    try:
+        for file in files:
+            path, size = await uploads.save_upload(file, user_dir, budget)
+            budget -= size
+            if path is None:
+                skipped.append(file.filename)
+            else:
+                saved.append(path)
+    except HTTPException:
+        for path in saved:
+            os.remove(path)
+        raise
 
-    return {"message": f"{len(files)} file(s) uploaded."}
+    return {
+        "message": f"{len(saved)} file(s) uploaded.",
+        "uploaded": [os.path.basename(path) for path in saved],
+        "skipped": skipped,
+    }
 
 # === Merge and Save ===
-@router.get("/merge")
-async def merge_files(user: str = Depends(get_current_user)):
+# /merge only validates the request and queues a background job; the job's
+# progress is read from /merge/{job_id}. A merge requested while the user's
+# previous one is still queued or running returns that job instead.
+async def run_merge(job: jobs.Job, user: str, paths: List[str]) -> dict:
+    job.files_total = len(paths)
+
+    def track(rows: int):
+        job.files_done += 1
+        job.rows += rows
+
+    frames = (df async for _, df in parsing.iter_parsed(paths))
+    async with SessionLocal() as session:
+        stats = await ingest.ingest_frames(session, frames, user, progress=track)
+    export.clear_exports(MERGED_BASE, user)
+    etags.bump_version(MERGED_BASE, user)
+    return stats
+
+@router.get("/merge", status_code=status.HTTP_202_ACCEPTED)
+async def merge_files(background_tasks: BackgroundTasks, user: str = Depends(get_current_user)):
     user_dir = os.path.join(UPLOAD_BASE, user)
-    files = [f for f in os.listdir(user_dir) if f.endswith((".xls", ".xlsx"))]
+    files = [f for f in os.listdir(user_dir) if f.lower().endswith(readers.SUPPORTED_EXTENSIONS)] if os.path.isdir(user_dir) else []
 
     if not files:
-        raise HTTPException(status_code=404, detail="No uploaded Excel files found.")
+        raise HTTPException(status_code=404, detail="No uploaded Excel, CSV or Parquet files found.")
 
-    async with SessionLocal() as session:
-        for file in files:
-            df = pd.read_excel(os.path.join(user_dir, file))
-            df.columns = [col.strip() for col in df.columns]
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df['Month'] = df['Date'].dt.strftime('%B')
-            df['Year'] = df['Date'].dt.year
-            df['Financial Year'] = df['Date'].apply(lambda d: f"{d.year-1}-{d.year}" if d.month <= 3 else f"{d.year}-{d.year+1}")
-            df['Invoice Value'] = df['Sale Value'] + df['Tax Value']
-
-            for row in df.itertuples(index=False):
-                record = SaleRecord(
-                    user=user,
-                    customer_code=getattr(row, 'Customer_Code', None),
-                    customer_name=getattr(row, 'Customer_Name', None),
-                    customer_place=getattr(row, 'Customer_Place', None),
-                    location_of_supply=getattr(row, 'Location_of_Supply', None),
-                    date=getattr(row, 'Date', None),
-                    product=getattr(row, 'Product', None),
-                    tax_rate=getattr(row, 'Tax_Rate', None),
-                    qty=getattr(row, 'Qty', None),
-                    unit_of_qty=getattr(row, 'Unit_of_Qty', None),
-                    sale_value=getattr(row, 'Sale_Value', None),
-                    tax_value=getattr(row, 'Tax_Value', None),
-                    total_value=getattr(row, 'Invoice Value', None),
-                    financial_year=getattr(row, 'Financial Year', None),
-                    month=getattr(row, 'Month', None)
-                )
-                session.add(record)
-        await session.commit()
-
-    return {"message": "Files merged and saved to database."}
-
-# === Preview Top 100 ===
+    job, created = jobs.merge_jobs.submit(user)
+    if created:
+        paths = [os.path.join(user_dir, file) for file in files]
+        background_tasks.add_task(jobs.merge_jobs.run, job, lambda job: run_merge(job, user, paths))
+    return {"message": "Merge queued." if created else "Merge already in progress.", **job.to_dict()}
+
+@router.get("/merge/{job_id}")
+async def merge_status(job_id: str, user: str = Depends(get_current_user)):
+    job = jobs.merge_jobs.get(job_id)
+    if job is None or job.user != user:
+        raise HTTPException(status_code=404, detail="Merge job not found.")
+    return job.to_dict()
+
+# === Preview (keyset pagination) ===
+# `cursor` is the last id of the previous page, returned in the X-Next-Cursor
+# header; `columns` is a comma-separated list of sale_records columns.
 @router.get("/preview")
-async def preview_data(user: str = Depends(get_current_user)):
-    async with SessionLocal() as session:
-        result = await session.execute(
-            select(SaleRecord).where(SaleRecord.user == user).limit(100)
-        )
-        records = result.scalars().all()
-        return [r.__dict__ for r in records]
+async def preview_data(
+    request: Request,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=PREVIEW_MAX_ROWS),
+    columns: str = "",
+    user: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    table = SaleRecord.__table__
+    selected = [col.strip() for col in columns.split(",") if col.strip()] or [col.name for col in table.columns]
+    unknown = [col for col in selected if col not in table.c]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    if "id" not in selected:
+        selected.insert(0, "id")
+
+    query = (
+        select(*(table.c[col] for col in selected))
+        .where(SaleRecord.user == user, SaleRecord.id > cursor)
+        .order_by(SaleRecord.id)
+        .limit(limit)
+    )
+    async def build():
+        with metrics.span("preview.query"):
+            result = await db.execute(query)
+            rows = [dict(row._mapping) for row in result.all()]
+        metrics.count_rows("preview", len(rows))
+
+        headers = {}
+        if len(rows) == limit:
+            headers["X-Next-Cursor"] = str(rows[-1]["id"])
+        return JSONResponse(jsonable_encoder(rows), headers=headers)
+
+    return await etags.cached_response(request, MERGED_BASE, user, build)
 
 # === Filtered Summary ===
+# Summaries are read from sale_summary, which /merge keeps rolled up at the
+# (user, financial_year, month, product, tax_rate) grain, instead of scanning
+# sale_records. The average tax rate is rebuilt from the per-rate row counts.
+def apply_filters(query, model=SaleRecord, month: str = "", financial_year: str = "", product: str = "", tax_rate: float = None):
+    if month:
+        query = query.where(model.month == month)
+    if financial_year:
+        query = query.where(model.financial_year == financial_year)
+    if product:
+        query = query.where(model.product == product)
+    if tax_rate is not None:
+        query = query.where(model.tax_rate == tax_rate)
+    return query
+
+def summary_query(user: str, month: str = "", financial_year: str = "", product: str = "", tax_rate: float = None):
+    rated_rows = func.sum(case((SaleSummary.tax_rate.isnot(None), SaleSummary.row_count)))
+    query = select(
+        SaleSummary.month,
+        SaleSummary.financial_year,
+        SaleSummary.product,
+        func.sum(SaleSummary.qty).label("Qty"),
+        func.sum(SaleSummary.sale_value).label("Sale Value"),
+        func.sum(SaleSummary.tax_value).label("Tax Value"),
+        func.sum(SaleSummary.total_value).label("Invoice Value"),
+        (func.sum(SaleSummary.tax_rate * SaleSummary.row_count) / rated_rows).label("Tax Rate")
+    ).where(SaleSummary.user == user)
+    query = apply_filters(query, SaleSummary, month, financial_year, product, tax_rate)
+    return query.group_by(SaleSummary.month, SaleSummary.financial_year, SaleSummary.product)
+
 @router.get("/summary")
 async def filtered_summary(
+    request: Request,
     month: str = "",
     financial_year: str = "",
     product: str = "",
     tax_rate: float = None,
-    user: str = Depends(get_current_user)
+    user: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    async with SessionLocal() as session:
-        query = select(
-            SaleRecord.month,
-            SaleRecord.financial_year,
-            SaleRecord.product,
-            func.sum(SaleRecord.qty).label("Qty"),
-            func.sum(SaleRecord.sale_value).label("Sale Value"),
-            func.sum(SaleRecord.tax_value).label("Tax Value"),
-            func.sum(SaleRecord.total_value).label("Invoice Value"),
-            func.avg(SaleRecord.tax_rate).label("Tax Rate")
-        ).where(SaleRecord.user == user)
-
-        if month:
-            query = query.where(SaleRecord.month == month)
-        if financial_year:
-            query = query.where(SaleRecord.financial_year == financial_year)
-        if product:
-            query = query.where(SaleRecord.product == product)
-        if tax_rate is not None:
-            query = query.where(SaleRecord.tax_rate == tax_rate)
-
-        query = query.group_by(SaleRecord.month, SaleRecord.financial_year, SaleRecord.product)
-        result = await session.execute(query)
-        return [dict(row._mapping) for row in result.fetchall()]
+    async def build():
+        with metrics.span("summary.query"):
+            result = await db.execute(summary_query(user, month, financial_year, product, tax_rate))
+            return JSONResponse(jsonable_encoder([dict(row._mapping) for row in result.fetchall()]))
+
+    return await etags.cached_response(request, MERGED_BASE, user, build)
 
 # === Download Filtered Excel ===
 @router.get("/download")
-async def download_excel(user: str = Depends(get_current_user)):
-    async with SessionLocal() as session:
-        result = await session.execute(
-            select(SaleRecord).where(SaleRecord.user == user)
-        )
-        records = result.scalars().all()
-
-    df = pd.DataFrame([r.__dict__ for r in records])
-    df.drop(columns=["_sa_instance_state"], inplace=True)
-    out_file = f"{user}_filtered.xlsx"
-    df.to_excel(out_file, index=False)
-
-    return FileResponse(
-        out_file,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename=out_file
-    )
+async def download_excel(
+    request: Request,
+    month: str = "",
+    financial_year: str = "",
+    product: str = "",
+    tax_rate: float = None,
+    view: str = "rows",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1),
+    fmt: str = Query("xlsx", alias="format"),
+    user: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if fmt not in export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format.")
+    if view not in ("rows", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'rows' or 'summary'.")
+    _, validators, fresh = etags.validators(request, MERGED_BASE, user)
+    if fresh:
+        return Response(status_code=304, headers=validators)
+
+    # Filters, offset and limit go into the SQL query; the resulting rows are
+    # streamed from the database in chunks and appended to the export file,
+    # which is reused until the dataset version changes.
+    key = export.export_key(version=etags.current_version(MERGED_BASE, user), month=month,
+                            financial_year=financial_year, product=product, tax_rate=tax_rate,
+                            view=None if view == "rows" else view, offset=offset or None, limit=limit)
+    out_file = export.export_path(MERGED_BASE, user, fmt, key)
+    if not export.is_fresh(out_file):
+        if view == "summary":
+            query = summary_query(user, month, financial_year, product, tax_rate)
+            query = query.order_by(SaleSummary.month, SaleSummary.financial_year, SaleSummary.product)
+        else:
+            query = select(*SaleRecord.__table__.columns).where(SaleRecord.user == user)
+            query = apply_filters(query, SaleRecord, month, financial_year, product, tax_rate).order_by(SaleRecord.id)
+        query = query.offset(offset).limit(limit)
+
+        with metrics.span("download.export"):
+            writer = export.ExportWriter(out_file, fmt, schema=ingest.arrow_schema(query.selected_columns))
+            result = await db.stream(query)
+            columns = list(result.keys())
+            async for rows in result.partitions(export.EXPORT_CHUNK_ROWS):
+                await run_in_threadpool(writer.write, pd.DataFrame(rows, columns=columns))
+                metrics.count_rows("download", len(rows))
+            await run_in_threadpool(writer.close, columns)
+        metrics.count_bytes("download", "written", os.path.getsize(out_file))
+    metrics.count_bytes("download", "sent", os.path.getsize(out_file))
+
+    response = export.streaming_response(out_file, f"{user}_filtered.{fmt}", fmt)
+    response.headers.update(validators)
+    return response
+
+# === Save Edits ===
+# Patches the edited rows in place (see ingest.apply_edits) instead of
+# re-merging the uploads; the response lists any ids that were not found.
+@router.post("/save-edits")
+async def save_edits(data: EditedData, user: str = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    if jobs.merge_jobs.active(user):
+        raise HTTPException(status_code=409, detail="A merge is in progress, try again once it finishes.")
+    with metrics.span("edits.apply"):
+        result = await ingest.apply_edits(db, user, data.rows)
+        await db.commit()
+    metrics.count_rows("edits", result["updated"])
+    if result["updated"]:
+        export.clear_exports(MERGED_BASE, user)
+        etags.bump_version(MERGED_BASE, user)
+    return {"message": f"{result['updated']} row(s) updated.", **result}
 
 # === Reset ===
 @router.delete("/reset")
-async def reset_all(user: str = Depends(get_current_user)):
+async def reset_all(user: str = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    if jobs.merge_jobs.active(user):
+        raise HTTPException(status_code=409, detail="A merge is in progress, try again once it finishes.")
     user_dir = os.path.join(UPLOAD_BASE, user)
     if os.path.exists(user_dir):
         for f in os.listdir(user_dir):
             os.remove(os.path.join(user_dir, f))
 
-    async with SessionLocal() as session:
-        await session.execute(
-            SaleRecord.__table__.delete().where(SaleRecord.user == user)
-        )
-        await session.commit()
+    await db.execute(
+        SaleRecord.__table__.delete().where(SaleRecord.user == user)
+    )
+    await ingest.clear_summary(db, user)
+    await db.commit()
+    export.clear_exports(MERGED_BASE, user)
+    etags.bump_version(MERGED_BASE, user)
 
     return {"message": "All uploaded files and records removed."}
 
+# === Connection Pool Stats ===
+@router.get("/db/stats")
+async def db_stats(user: str = Depends(get_current_user)):
+    return pool_stats()
+
+# === Token Cache Stats ===
+@router.get("/cache/stats")
+async def cache_stats(user: str = Depends(get_current_user)):
+    return {"results": etags.results.stats(), "tokens": tokens.stats()}
+
 # Mount all routes
 app.include_router(router)
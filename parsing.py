@@ -0,0 +1,65 @@
+# backend/parsing.py
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Tuple
+
+import pandas as pd
+
+import enrich
+import metrics
+import readers
+
+# === Config ===
+# Number of worker processes used to parse uploaded workbooks. Parsing is
+# CPU-bound, so it runs outside the event loop and is capped so a large
+# upload cannot starve other requests.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(PARSE_WORKERS, 1))
+    return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+# === Parse a single upload (runs inside a worker process) ===
+# The read and enrich timings are returned in df.attrs["stage_seconds"], since
+# metrics recorded in the worker process would never reach /metrics.
+def load_file(path: str) -> pd.DataFrame:
+    started = time.perf_counter()
+    df = readers.read_file(path)
+    read_done = time.perf_counter()
+    if 'Date' in df.columns:
+        enrich.add_date_columns(df, 'Date')
+    if {'Sale Value', 'Tax Value'}.issubset(df.columns):
+        df['Invoice Value'] = df['Sale Value'] + df['Tax Value']
+    df.attrs["stage_seconds"] = {"parse.read": read_done - started, "parse.enrich": time.perf_counter() - read_done}
+    return df
+
+# === Parse many workbooks concurrently, yielding each one in order ===
+# All files are submitted to the pool up front; results are handed back one
+# at a time so the caller can process and release each frame before the next.
+async def iter_parsed(paths: List[str]) -> AsyncIterator[Tuple[str, pd.DataFrame]]:
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    futures = [loop.run_in_executor(pool, load_file, path) for path in paths]
+    try:
+        for path, future in zip(paths, futures):
+            df = await future
+            metrics.record_frame_stages(df)
+            metrics.count_rows("parse", len(df))
+            metrics.count_bytes("parse", "read", os.path.getsize(path))
+            yield path, df
+    finally:
+        for future in futures:
+            future.cancel()
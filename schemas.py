@@ -15,23 +15,32 @@ class Token(BaseModel):
 
 # ✅ Uploaded Excel row structure (for edits or processing)
 class ExcelRow(BaseModel):
-    Customer_Code: Optional[str]
-    Customer_Name: Optional[str]
-    Customer_Place: Optional[str]
-    Location_of_Supply: Optional[str]
-    Date: Optional[str]
-    Product: Optional[str]
-    Tax_Rate: Optional[float]
-    Qty: Optional[float]
-    Unit_of_Qty: Optional[str]
-    Sale_Value: Optional[float]
-    Tax_Value: Optional[float]
-    Total_Value: Optional[float]
-    Financial_Year: Optional[str]
+    Customer_Code: Optional[str] = None
+    Customer_Name: Optional[str] = None
+    Customer_Place: Optional[str] = None
+    Location_of_Supply: Optional[str] = None
+    Date: Optional[str] = None
+    Product: Optional[str] = None
+    Tax_Rate: Optional[float] = None
+    Qty: Optional[float] = None
+    Unit_of_Qty: Optional[str] = None
+    Sale_Value: Optional[float] = None
+    Tax_Value: Optional[float] = None
+    Total_Value: Optional[float] = None
+    Financial_Year: Optional[str] = None
+
+# ✅ One edited row: its id (as returned by /preview) and the fields to change.
+# Fields left out of the request keep their current value; sending null clears one.
+class EditedRow(ExcelRow):
+    id: int
+
+    # Changed fields keyed by column name ("Sale Value")
+    def changes(self) -> dict:
+        return {name.replace("_", " "): getattr(self, name) for name in self.model_fields_set if name != "id"}
 
 # ✅ For saving edited rows back to backend
 class EditedData(BaseModel):
-    rows: List[ExcelRow]
+    rows: List[EditedRow]
 
 # === 📋 Filter Parameters for Summary API ===
 
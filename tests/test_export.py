@@ -0,0 +1,40 @@
+# tests/test_export.py
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import export
+
+def test_parquet_export_with_leading_all_null_column(tmp_path):
+    schema = pa.schema([("Customer Place", pa.string()), ("Qty", pa.float64())])
+    path = tmp_path / "out.parquet"
+    writer = export.ExportWriter(str(path), "parquet", schema=schema)
+    writer.write(pd.DataFrame({"Customer Place": [None, None], "Qty": [1.0, 2.0]}))
+    writer.write(pd.DataFrame({"Customer Place": ["Pune", None], "Qty": [3.0, None]}))
+    writer.close()
+
+    table = pq.read_table(path)
+    assert table.schema.field("Customer Place").type == pa.string()
+    assert table.column("Customer Place").to_pylist() == [None, None, "Pune", None]
+
+def test_filtered_parquet_export_keeps_source_types(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_CHUNK_ROWS", 2)
+    source = tmp_path / "merged.parquet"
+    df = pd.DataFrame({
+        "Customer Code": [None, None, "27ABCDE1234F1Z5", "07ABCDE1234F1Z5"],
+        "Tax Rate": [5.0, 5.0, 5.0, 18.0],
+    })
+    df.to_parquet(source, index=False)
+
+    path = tmp_path / "out.parquet"
+    export.export_parquet(str(source), str(path), "parquet", filters=[("Tax Rate", "==", 5.0)])
+
+    table = pq.read_table(path)
+    assert table.schema.field("Customer Code").type == pa.string()
+    assert table.column("Customer Code").to_pylist() == [None, None, "27ABCDE1234F1Z5"]
+
+def test_export_key_changes_with_dataset_version():
+    old = export.export_key(version="1", month="April")
+    assert export.export_key(version="2", month="April") != old
+    assert export.export_key(version="1", month="April") == old
@@ -0,0 +1,53 @@
+# uploads.py
+
+import hashlib
+import os
+import uuid
+
+import anyio
+from fastapi import HTTPException, UploadFile, status
+
+# === Config ===
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", 100 * 1024 * 1024))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", 500 * 1024 * 1024))
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):g} MB"
+
+# === Stream one upload to disk ===
+# The file is copied in UPLOAD_CHUNK_BYTES chunks and hashed as it is written,
+# so memory use does not depend on the file size. Stored files are named
+# `<sha256 prefix>_<filename>`; when the user already has a file with the same
+# content the copy is discarded and None is returned. `budget` is what is
+# left of the per-request size limit.
+async def save_upload(file: UploadFile, user_dir: str, budget: int):
+    name = os.path.basename(file.filename or "upload")
+    tmp_path = os.path.join(user_dir, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > UPLOAD_MAX_FILE_BYTES:
+                    raise _too_large(f"{name} is larger than the {_mb(UPLOAD_MAX_FILE_BYTES)} per-file limit.")
+                if size > budget:
+                    raise _too_large(f"Upload is larger than the {_mb(UPLOAD_MAX_REQUEST_BYTES)} per-request limit.")
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    key = digest.hexdigest()[:16]
+    if any(entry.startswith(f"{key}_") for entry in os.listdir(user_dir)):
+        os.remove(tmp_path)
+        return None, size
+    path = os.path.join(user_dir, f"{key}_{name}")
+    os.replace(tmp_path, path)
+    return path, size
@@ -1,5 +1,13 @@
 # backend/utils.py
 
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from passlib.context import CryptContext
@@ -14,6 +22,134 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 # === Password Hashing Context ===
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# === Password Hashing Pool ===
+# bcrypt costs 100-300 ms of CPU per call, so hashing and verification run on
+# a small dedicated thread pool instead of the event loop. At most
+# HASH_WORKERS calls run at once; up to HASH_QUEUE_LIMIT more may wait, and
+# anything beyond that is rejected with 503 rather than queueing unbounded.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 64))
+
+_hash_pool = None
+_hash_pending = 0
+
+def get_hash_pool() -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(max_workers=max(HASH_WORKERS, 1), thread_name_prefix="bcrypt")
+    return _hash_pool
+
+# Only code that mounts auth.router hashes on this pool, so it shuts the pool
+# down itself (benchmarks/auth_load.py does); neither app starts it.
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+async def run_in_hash_pool(func, *args):
+    global _hash_pending
+    if _hash_pending >= max(HASH_WORKERS, 1) + HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, please retry.",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_hash_pool(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+# === Verified Token Cache ===
+# Claims of tokens that already passed signature and expiry checks are kept
+# until the token's `exp` (or TOKEN_CACHE_TTL seconds, whichever is sooner),
+# so repeated requests with the same token skip jwt.decode. Entries are keyed
+# by an HMAC of the token under the signing key, so a token verified with one
+# key is never accepted for another, and raw tokens are not held in memory.
+# Usernames confirmed to exist in the users table are remembered for
+# USER_CHECK_TTL seconds; misses are never cached.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10_000))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+USER_CHECK_TTL = int(os.getenv("USER_CHECK_TTL", 60))
+
+class TokenCache:
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE, ttl: int = TOKEN_CACHE_TTL, user_ttl: int = USER_CHECK_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.user_ttl = user_ttl
+        self._entries = OrderedDict()
+        self._users = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.user_hits = 0
+        self.user_misses = 0
+
+    def decode(self, token: str, secret: str, algorithm: str) -> dict:
+        key = hmac.new(secret.encode(), token.encode(), hashlib.sha256).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+
+        claims = jwt.decode(token, secret, algorithms=[algorithm])
+        expires = now + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires = min(expires, claims["exp"])
+        with self._lock:
+            self._entries[key] = (expires, claims)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return claims
+
+    def user_known(self, username: str) -> bool:
+        with self._lock:
+            expires = self._users.get(username)
+            if expires and expires > time.time():
+                self.user_hits += 1
+                return True
+            self._users.pop(username, None)
+            self.user_misses += 1
+            return False
+
+    def remember_user(self, username: str) -> None:
+        with self._lock:
+            if len(self._users) >= self.max_entries:
+                self._users.clear()
+            self._users[username] = time.time() + self.user_ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._users.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            user_lookups = self.user_hits + self.user_misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "users": len(self._users),
+                "user_hits": self.user_hits,
+                "user_misses": self.user_misses,
+                "user_hit_rate": round(self.user_hits / user_lookups, 4) if user_lookups else 0.0,
+            }
+
+tokens = TokenCache()
+
 # === OAuth2 Dependency ===
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
@@ -40,7 +176,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = tokens.decode(token, SECRET_KEY, ALGORITHM)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception